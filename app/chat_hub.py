@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from dataclasses import dataclass, field
+
+from .models import Message
+from .schemas import MessageResponse
+
+
+# In-process pub/sub for new chat messages.
+#
+# Subscribers are async (WebSocket / long-poll handlers) and live on the event loop; publishers are
+# the sync route handlers, which FastAPI runs in a worker thread. `publish` therefore hands
+# each message to the subscriber's loop with `call_soon_threadsafe` instead of touching
+# the asyncio queue directly.
+#
+# Messages are only delivered to subscribers of this process. With several uvicorn
+# workers, a client connected to another worker catches up through GET .../messages?after_id=.
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+@dataclass(eq=False)
+class Subscription:
+    conversation_id: int
+    user_id: int
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(SUBSCRIBER_QUEUE_SIZE))
+    # Set when the subscriber fell too far behind and messages were dropped;
+    # the consumer should disconnect so the client refetches what it missed.
+    overflowed: bool = False
+
+    async def get(self) -> MessageResponse | None:
+        """Next message for this subscriber, or None once it has overflowed."""
+        if self.overflowed:
+            return None
+        message = await self.queue.get()
+        return None if self.overflowed else message
+
+    def _deliver(self, message: MessageResponse | None) -> None:
+        # Runs on the subscriber's loop.
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            # Wake a consumer blocked in `get` so it notices the overflow.
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class ChatHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: dict[int, set[Subscription]] = {}
+
+    def subscribe(self, conversation_id: int, user_id: int) -> Subscription:
+        """Register a subscriber; must be called from the event loop that will consume it."""
+        sub = Subscription(conversation_id=conversation_id, user_id=user_id, loop=asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.setdefault(conversation_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subscriptions.get(sub.conversation_id)
+            if subs is None:
+                return
+            subs.discard(sub)
+            if not subs:
+                del self._subscriptions[sub.conversation_id]
+
+    def publish(self, conversation_id: int, message: MessageResponse) -> None:
+        """Fan a committed message out to the conversation's subscribers. Safe from any thread."""
+        with self._lock:
+            subs = list(self._subscriptions.get(conversation_id, ()))
+
+        for sub in subs:
+            # isMine depends on who is listening.
+            is_mine = message.senderId == sub.user_id if message.senderId is not None else None
+            payload = message.model_copy(update={"isMine": is_mine})
+            try:
+                sub.loop.call_soon_threadsafe(sub._deliver, payload)
+            except RuntimeError:
+                # The subscriber's loop is closed (server shutting down).
+                self.unsubscribe(sub)
+
+    def subscriber_count(self, conversation_id: int) -> int:
+        with self._lock:
+            return len(self._subscriptions.get(conversation_id, ()))
+
+
+chat_hub = ChatHub()
+
+
+def system_message_response(msg: Message) -> MessageResponse:
+    """Payload of a SYSTEM message (status changes); these have no sender to resolve."""
+    return MessageResponse(
+        id=msg.id,
+        type=msg.type,
+        text=msg.text,
+        createdAt=msg.created_at,
+        fromCompany=False,
+        isSystem=True,
+    )
+
+
+def publish_system_message(msg: Message) -> None:
+    """Publish a committed SYSTEM message."""
+    chat_hub.publish(msg.conversation_id, system_message_response(msg))
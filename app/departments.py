@@ -75,6 +75,18 @@ def normalize_department(value: str | None) -> str | None:
     return cleaned
 
 
+def department_key(value: str | None) -> str | None:
+    """Stored, index-friendly form of a department: normalized and lower-cased.
+
+    Feed filters compare against this key instead of wrapping the column in
+    trim()/lower(), so the department indexes can be used.
+    """
+    normalized = normalize_department(value)
+    if normalized is None:
+        return None
+    return normalized.lower()
+
+
 def is_canonical_department(value: str | None) -> bool:
     if value is None:
         return False
@@ -17,12 +17,9 @@ def get_db():
         db.close()
 
 
-def get_current_user(
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
-    db: Session = Depends(get_db),
-) -> User:
+def user_from_token(db: Session, token: str) -> User:
     try:
-        user_id = decode_token(creds.credentials)
+        user_id = decode_token(token)
     except ValueError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
@@ -30,3 +27,10 @@ def get_current_user(
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     return user
+
+
+def get_current_user(
+    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    db: Session = Depends(get_db),
+) -> User:
+    return user_from_token(db, creds.credentials)
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from .models import UserRole
+
+
+# In-process cache of feed candidate IDs (the ordered card IDs of one feed page).
+#
+# Entries are never patched; writes that change what a user may see bump a generation
+# counter instead, and an entry is only served while the generations it was computed
+# under are still current:
+# - a per-user generation, bumped by that user's decisions / application changes;
+# - a per-role generation, bumped by catalog-wide changes (a new/edited/deleted internship
+#   post changes every student's feed; a student profile-post update every company's).
+#
+# The cache lives in the worker process. The TTL bounds staleness from writes made
+# by other processes (e.g. the seed script or a second uvicorn worker).
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_TTL_SECONDS = 300.0
+
+
+class FeedCache:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple[tuple[int, int], float, object]] = OrderedDict()
+        self._user_generations: dict[int, int] = {}
+        self._role_generations: dict[UserRole, int] = {role: 0 for role in UserRole}
+
+    def token(self, role: UserRole, user_id: int) -> tuple[int, int]:
+        """Generation token to pass to `put` — take it *before* running the feed query."""
+        with self._lock:
+            return self._token(role, user_id)
+
+    def get(self, role: UserRole, user_id: int, key: Hashable):
+        with self._lock:
+            cache_key = (role, user_id, key)
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            token, expires_at, value = entry
+            if token != self._token(role, user_id) or expires_at < time.monotonic():
+                del self._entries[cache_key]
+                return None
+            self._entries.move_to_end(cache_key)
+            return value
+
+    def put(self, role: UserRole, user_id: int, key: Hashable, value, token: tuple[int, int]) -> None:
+        with self._lock:
+            # A write landed while the query was running; its result may already be stale.
+            if token != self._token(role, user_id):
+                return
+            cache_key = (role, user_id, key)
+            self._entries[cache_key] = (token, time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_users(self, *user_ids: int) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                self._user_generations[user_id] = self._user_generations.get(user_id, 0) + 1
+
+    def invalidate_role(self, role: UserRole) -> None:
+        with self._lock:
+            self._role_generations[role] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _token(self, role: UserRole, user_id: int) -> tuple[int, int]:
+        return self._role_generations[role], self._user_generations.get(user_id, 0)
+
+
+feed_cache = FeedCache()
+
+
+def invalidate_student_feeds() -> None:
+    """Internship posts were created, edited or removed."""
+    feed_cache.invalidate_role(UserRole.STUDENT)
+
+
+def invalidate_company_feeds() -> None:
+    """
+    A student profile post appeared, its `updated_at` moved (re-shows PASSed cards), or a
+    student made their first decision (hides the cards companies have LIKEd).
+    """
+    feed_cache.invalidate_role(UserRole.COMPANY)
+
+
+def invalidate_match_feeds(student_user_id: int, company_user_id: int) -> None:
+    """A decision or application change between this student and company."""
+    feed_cache.invalidate_users(student_user_id, company_user_id)
@@ -7,14 +7,15 @@ from .db import engine, Base
 from .routers.auth_routes import router as auth_router
 from .routers.posts_routes import router as posts_router
 from .routers.feed_routes import router as feed_router
-from .routers.interaction_routes import router as interactions_router
+from .routers.interaction_routes import router as interactions_router, decision_projector
 from .routers.application_routes import router as applications_router
 from .routers.chat_routes import router as chat_router
 from .routers.profile_posts_routes import router as profile_posts_router
 from .routers.profiles_routes import router as profiles_router
 from .routers.media_routes import router as media_router
 from app.routers import saves_routes
-from .migrations import ensure_sqlite_columns
+from .migrations import ensure_sqlite_columns, ensure_indexes, ensure_conversation_participants
+from .pagination import NEXT_CURSOR_HEADER
 
 app = FastAPI(title="UnIntend Backend")
 
@@ -25,6 +26,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Create tables (simple approach)
@@ -32,6 +34,11 @@ Base.metadata.create_all(bind=engine)
 
 # Ensure new columns exist for SQLite (no Alembic migrations in this project)
 ensure_sqlite_columns(engine)
+ensure_indexes(engine)
+ensure_conversation_participants(engine)
+
+# Project decisions logged but not projected before the last shutdown
+decision_projector.run(engine)
 
 # Serve uploaded images
 uploads_dir = (Path(__file__).resolve().parent.parent / "uploads")
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import event, inspect
+
+from .models import ConversationParticipant
+
+
+# In-process cache of conversation memberships: (conversation_id, user_id) pairs known to
+# have a ConversationParticipant row. It backs `chat_routes.can_access_conversation`,
+# which gates every chat call.
+#
+# Only positive answers are cached, so a participant row created later is seen at once;
+# entries must be dropped when a row goes away or is re-pointed. ORM deletes/updates do
+# that through the mapper events below; bulk `query.delete()` / raw SQL must call
+# `invalidate_conversation` themselves.
+
+DEFAULT_MAX_ENTRIES = 8192
+
+
+class MembershipCache:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[int, int], None] = OrderedDict()
+
+    def contains(self, conversation_id: int, user_id: int) -> bool:
+        key = (conversation_id, user_id)
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(self, conversation_id: int, user_id: int) -> None:
+        key = (conversation_id, user_id)
+        with self._lock:
+            self._entries[key] = None
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_conversation(self, conversation_id: int) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == conversation_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+membership_cache = MembershipCache()
+
+
+@event.listens_for(ConversationParticipant, "after_delete")
+def _participant_deleted(mapper, connection, target: ConversationParticipant) -> None:
+    membership_cache.invalidate_conversation(target.conversation_id)
+
+
+@event.listens_for(ConversationParticipant, "after_update")
+def _participant_updated(mapper, connection, target: ConversationParticipant) -> None:
+    # Read-pointer / counter updates happen all the time and do not change membership.
+    state = inspect(target)
+    conversation_history = state.attrs.conversation_id.history
+    if not (conversation_history.has_changes() or state.attrs.user_id.history.has_changes()):
+        return
+    for conversation_id in {target.conversation_id, *conversation_history.deleted}:
+        membership_cache.invalidate_conversation(conversation_id)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import case, or_
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .models import Application, Conversation, ConversationParticipant, Message, MessageType
+from .upserts import upsert
+
+
+# Denormalized read-side state of the chat, kept in the transaction that changes it.
+# Every Message insert goes through `add_message`, which maintains:
+# - Conversation.last_message_id / last_message_at / last_message_preview (inbox rows);
+# - ConversationParticipant.unread_count (badges). A message is unread for a participant
+#   when it comes after their read pointer and was sent by someone else; SYSTEM messages
+#   (no sender) never count. Sending a message moves the sender's own read pointer to it;
+#   mark-as-read zeroes it, or recounts it for a partial read (chat_routes._mark_read).
+#
+# The RECONCILE_* statements recompute both from `messages` (startup backfill when the
+# columns are added, scripts/reconcile_unread_counts.py).
+
+RECONCILE_UNREAD_COUNTS_SQL = """
+UPDATE conversation_participants
+SET unread_count = (
+    SELECT count(*) FROM messages m
+    WHERE m.conversation_id = conversation_participants.conversation_id
+      AND m.id > coalesce(conversation_participants.last_read_message_id, 0)
+      AND m.sender_user_id IS NOT NULL
+      AND m.sender_user_id != conversation_participants.user_id
+)
+"""
+
+
+LAST_MESSAGE_PREVIEW_LENGTH = 140
+
+RECONCILE_LAST_MESSAGES_SQL = f"""
+UPDATE conversations
+SET last_message_id = (
+        SELECT max(m.id) FROM messages m WHERE m.conversation_id = conversations.id
+    ),
+    last_message_at = (
+        SELECT m.created_at FROM messages m WHERE m.conversation_id = conversations.id
+        ORDER BY m.id DESC LIMIT 1
+    ),
+    last_message_preview = (
+        SELECT substr(m.text, 1, {LAST_MESSAGE_PREVIEW_LENGTH}) FROM messages m
+        WHERE m.conversation_id = conversations.id
+        ORDER BY m.id DESC LIMIT 1
+    )
+"""
+
+
+def add_message(
+    db: Session,
+    *,
+    conversation_id: int,
+    text: str,
+    type: MessageType = MessageType.USER,
+    sender_user_id: int | None = None,
+) -> Message:
+    """Insert a message (flushed, so it has an id) and update the conversation / participant counters."""
+    msg = Message(
+        conversation_id=conversation_id,
+        type=type,
+        sender_user_id=sender_user_id,
+        text=text,
+    )
+    db.add(msg)
+    db.flush()
+
+    (
+        db.query(Conversation)
+        .filter(
+            Conversation.id == conversation_id,
+            # Never move the pointer back if a concurrent, newer message got there first.
+            or_(Conversation.last_message_id.is_(None), Conversation.last_message_id < msg.id),
+        )
+        .update(
+            {
+                Conversation.last_message_id: msg.id,
+                Conversation.last_message_at: msg.created_at,
+                Conversation.last_message_preview: text[:LAST_MESSAGE_PREVIEW_LENGTH],
+            },
+            synchronize_session=False,
+        )
+    )
+    _update_participants(db, conversation_id=conversation_id, message_id=msg.id, sender_user_id=sender_user_id)
+    return msg
+
+
+def open_conversation(db: Session, app: Application, text: str) -> tuple[Conversation, Message | None]:
+    """
+    Get or create the application's conversation. Conversations are opened lazily (on a match,
+    or when someone first opens the chat), not on every swipe.
+
+    A new conversation starts with the SYSTEM message `text` and both participant rows;
+    that message is returned so the caller can publish it after the commit (None if the
+    conversation already existed). The upsert makes concurrent opens safe.
+    """
+    conv = upsert(
+        db,
+        Conversation,
+        conflict=("application_id",),
+        values=dict(application_id=app.id, created_at=datetime.utcnow()),
+    )
+    set_committed_value(app, "conversation", conv)
+    if conv.last_message_id is not None:
+        return conv, None
+
+    msg = add_message(db, conversation_id=conv.id, type=MessageType.SYSTEM, text=text)
+    for user_id in (app.student_user_id, app.company_user_id):
+        db.add(ConversationParticipant(
+            conversation_id=conv.id,
+            user_id=user_id,
+            last_read_message_id=msg.id,
+            updated_at=datetime.utcnow(),
+        ))
+    db.flush()
+    return conv, msg
+
+
+def _update_participants(db: Session, *, conversation_id: int, message_id: int, sender_user_id: int | None) -> None:
+    """
+    One UPDATE over the conversation's participant rows: the message is unread for everyone
+    but its sender, and sending moves the sender's read pointer to their own message.
+    """
+    if sender_user_id is None:
+        return
+    is_sender = ConversationParticipant.user_id == sender_user_id
+    (
+        db.query(ConversationParticipant)
+        .filter(ConversationParticipant.conversation_id == conversation_id)
+        .update(
+            {
+                ConversationParticipant.unread_count: case(
+                    (is_sender, 0), else_=ConversationParticipant.unread_count + 1,
+                ),
+                ConversationParticipant.last_read_message_id: case(
+                    (is_sender, message_id), else_=ConversationParticipant.last_read_message_id,
+                ),
+                ConversationParticipant.updated_at: case(
+                    (is_sender, datetime.utcnow()), else_=ConversationParticipant.updated_at,
+                ),
+            },
+            synchronize_session=False,
+        )
+    )
@@ -2,6 +2,11 @@ from __future__ import annotations
 
 from sqlalchemy import text
 
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+from .db import Base
+from .departments import department_key
+from .messaging import RECONCILE_LAST_MESSAGES_SQL, RECONCILE_UNREAD_COUNTS_SQL
+
 
 # Simple SQLite-only "add missing columns" helper.
 # This project does not use Alembic migrations.
@@ -35,10 +40,12 @@ def ensure_sqlite_columns(engine) -> None:
         "internship_posts": {
             "image_url": "TEXT",
             "department": "TEXT",
+            "department_key": "TEXT",
         },
         "student_profile_posts": {
             "image_url": "TEXT",
             "updated_at": "TEXT",
+            "department_key": "TEXT",
         },
         "student_experience_posts": {
             "image_url": "TEXT",
@@ -47,8 +54,22 @@ def ensure_sqlite_columns(engine) -> None:
             "student_decision": "TEXT",  # LIKE/PASS/None
             "company_decision": "TEXT",  # LIKE/PASS/None
         },
+        "conversations": {
+            "last_message_id": "INTEGER",
+            "last_message_at": "TEXT",
+            "last_message_preview": "TEXT",
+        },
+        "conversation_participants": {
+            "unread_count": "INTEGER NOT NULL DEFAULT 0",
+        },
+        "decision_events": {
+            "projected_at": "TEXT",
+            "status": "TEXT",
+        },
     }
 
+    added: set[tuple[str, str]] = set()
+
     with engine.connect() as conn:
         for table_name, columns in needed.items():
             rows = conn.execute(text(f"PRAGMA table_info({table_name})")).fetchall()
@@ -58,5 +79,78 @@ def ensure_sqlite_columns(engine) -> None:
                 if column_name in existing:
                     continue
                 conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {ddl}"))
+                added.add((table_name, column_name))
+
+        # Fill derived columns once, right after they are added.
+        if ("internship_posts", "department_key") in added:
+            _backfill_post_department_keys(conn)
+        if ("student_profile_posts", "department_key") in added:
+            _backfill_student_post_department_keys(conn)
+        if ("conversations", "last_message_id") in added:
+            conn.execute(text(RECONCILE_LAST_MESSAGES_SQL))
+        if ("conversation_participants", "unread_count") in added:
+            conn.execute(text(RECONCILE_UNREAD_COUNTS_SQL))
+        if ("decision_events", "projected_at") in added:
+            # Events logged so far were projected by the request that logged them.
+            conn.execute(text("UPDATE decision_events SET projected_at = created_at"))
+
+        conn.commit()
+
+
+def ensure_indexes(engine) -> None:
+    """Create indexes declared on the models that are missing from existing tables.
 
+    `create_all` only creates indexes together with new tables, so indexes added
+    to an existing model would otherwise never reach an existing DB.
+    """
+    with engine.connect() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+        conn.commit()
+
+
+def ensure_conversation_participants(engine) -> None:
+    """Create the missing participant rows (student + company) of every conversation.
+
+    Older DBs (and the seed script) have conversations without participant rows; request
+    handlers rely on both rows existing. New rows start "read up to the last message",
+    matching what the old lazy backfill did.
+    """
+    with engine.connect() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO conversation_participants (conversation_id, user_id, last_read_message_id, updated_at) "
+                "SELECT c.id, u.user_id, "
+                "       (SELECT max(m.id) FROM messages m WHERE m.conversation_id = c.id), "
+                "       CURRENT_TIMESTAMP "
+                "FROM conversations c "
+                "JOIN (SELECT id AS application_id, student_user_id AS user_id FROM applications "
+                "      UNION ALL "
+                "      SELECT id, company_user_id FROM applications) u ON u.application_id = c.application_id "
+                "WHERE NOT EXISTS ("
+                "    SELECT 1 FROM conversation_participants cp "
+                "    WHERE cp.conversation_id = c.id AND cp.user_id = u.user_id"
+                ")"
+            )
+        )
         conn.commit()
+
+
+def _backfill_post_department_keys(conn) -> None:
+    rows = conn.execute(text("SELECT id, department FROM internship_posts")).fetchall()
+    updates = [{"id": post_id, "key": department_key(dept)} for post_id, dept in rows]
+    if updates:
+        conn.execute(text("UPDATE internship_posts SET department_key = :key WHERE id = :id"), updates)
+
+
+def _backfill_student_post_department_keys(conn) -> None:
+    rows = conn.execute(
+        text(
+            "SELECT spp.id, sp.department FROM student_profile_posts spp "
+            "JOIN student_profiles sp ON sp.user_id = spp.student_user_id"
+        )
+    ).fetchall()
+    updates = [{"id": post_id, "key": department_key(dept)} for post_id, dept in rows]
+    if updates:
+        conn.execute(text("UPDATE student_profile_posts SET department_key = :key WHERE id = :id"), updates)
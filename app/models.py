@@ -3,7 +3,7 @@ from datetime import datetime
 
 from sqlalchemy import (
     Column, Integer, String, DateTime, Boolean, ForeignKey,
-    Text, UniqueConstraint, Enum
+    Text, UniqueConstraint, Enum, Index, text
 )
 from sqlalchemy.orm import relationship
 
@@ -89,6 +89,12 @@ class CompanyProfile(Base):
 
 class InternshipPost(Base):
     __tablename__ = "internship_posts"
+    __table_args__ = (
+        Index("ix_internship_posts_dept_active_created", "department_key", "is_active", "created_at"),
+        Index("ix_internship_posts_active_created", "is_active", "created_at"),
+        # A company's most recent active post (company decisions link to it).
+        Index("ix_internship_posts_company_active_created", "company_user_id", "is_active", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     company_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -98,6 +104,8 @@ class InternshipPost(Base):
     location = Column(String(120), nullable=True)
 
     department = Column(String(120), nullable=True)
+    # departments.department_key(department); kept in sync on every write, used by feed filters
+    department_key = Column(String(120), nullable=True)
 
     image_url = Column(Text, nullable=True)
 
@@ -113,6 +121,10 @@ class StudentProfilePost(Base):
     μια περιγραφή/κάρτα του προφίλ του φοιτητή (σαν post).
     """
     __tablename__ = "student_profile_posts"
+    __table_args__ = (
+        Index("ix_student_profile_posts_dept_active_created", "department_key", "is_active", "created_at"),
+        Index("ix_student_profile_posts_active_created", "is_active", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     student_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -121,6 +133,10 @@ class StudentProfilePost(Base):
     description = Column(Text, nullable=False)      # bio/skills/summary
     location = Column(String(120), nullable=True)
 
+    # departments.department_key(StudentProfile.department), copied here so the company feed
+    # can filter by department without joining student_profiles
+    department_key = Column(String(120), nullable=True)
+
     image_url = Column(Text, nullable=True)
 
     is_active = Column(Boolean, default=True, nullable=False)
@@ -203,6 +219,48 @@ class CompanyStudentPostInteraction(Base):
     student_post = relationship("StudentProfilePost")
 
 
+class DecisionEvent(Base):
+    """
+    Append-only log of every LIKE/PASS (student -> post, company -> student post).
+    Τα interaction rows και τα decisions/status των applications είναι projections
+    αυτού του log: τα endpoints κάνουν μόνο το append και ο projector
+    (interaction_routes.project_pending_decisions) τα ενημερώνει μετά το response.
+    Ξαναχτίζονται από το log με scripts/rebuild_decision_projections.py.
+    """
+    __tablename__ = "decision_events"
+    __table_args__ = (
+        # The projector's queue: only the few events not projected yet are indexed.
+        Index(
+            "ix_decision_events_pending",
+            "id",
+            sqlite_where=text("projected_at IS NULL"),
+            postgresql_where=text("projected_at IS NULL"),
+        ),
+        # The latest event of an application (POST /applications/{id}/status), and the
+        # rebuild's "does this row have events" probes.
+        Index("ix_decision_events_student_post", "student_user_id", "post_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    actor_role = Column(Enum(UserRole), nullable=False)
+    student_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    company_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # The application's post (the student's target; for companies the post the projector
+    # linked the decision to, None until then or if the company had no active post).
+    post_id = Column(Integer, ForeignKey("internship_posts.id"), nullable=True)
+    # The company's target.
+    student_post_id = Column(Integer, ForeignKey("student_profile_posts.id"), nullable=True)
+
+    decision = Column(Enum(Decision), nullable=False)
+    # A status the company set explicitly (POST /applications/{id}/status). Applied as-is
+    # instead of the status computed from the decisions; these events carry decision NONE.
+    status = Column(Enum(ApplicationStatus), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Set when the projector has applied the event.
+    projected_at = Column(DateTime, nullable=True)
+
+
 # ============================================================
 # APPLICATIONS + CHAT
 # ============================================================
@@ -215,6 +273,10 @@ class Application(Base):
     __tablename__ = "applications"
     __table_args__ = (
         UniqueConstraint("post_id", "student_user_id", name="uq_post_student_application"),
+        Index("ix_applications_company_updated", "company_user_id", "updated_at"),
+        Index("ix_applications_student_updated", "student_user_id", "updated_at"),
+        # Latest application between a company and a student (company decisions).
+        Index("ix_applications_company_student_updated", "company_user_id", "student_user_id", "updated_at"),
     )
 
     id = Column(Integer, primary_key=True)
@@ -245,6 +307,11 @@ class Conversation(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    # Denormalized last message, for inbox rows (maintained by app/messaging.py add_message)
+    last_message_id = Column(Integer, nullable=True)
+    last_message_at = Column(DateTime, nullable=True)
+    last_message_preview = Column(Text, nullable=True)
+
     application = relationship("Application", back_populates="conversation")
     messages = relationship("Message", back_populates="conversation")
 
@@ -255,6 +322,8 @@ class ConversationParticipant(Base):
     __tablename__ = "conversation_participants"
     __table_args__ = (
         UniqueConstraint("conversation_id", "user_id", name="uq_conversation_user"),
+        # Covers the unread badge query (GET /conversations/unread-summary).
+        Index("ix_conversation_participants_user_unread", "user_id", "unread_count", "conversation_id"),
     )
 
     id = Column(Integer, primary_key=True)
@@ -264,6 +333,8 @@ class ConversationParticipant(Base):
 
     # Unread calculation uses: messages.id > last_read_message_id AND sender_user_id != user_id
     last_read_message_id = Column(Integer, ForeignKey("messages.id"), nullable=True)
+    # Stored count of the above (maintained on write, see app/messaging.py)
+    unread_count = Column(Integer, default=0, server_default="0", nullable=False)
 
     updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
@@ -273,6 +344,10 @@ class ConversationParticipant(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Chat history is paged by id within a conversation.
+        Index("ix_messages_conversation_id_id", "conversation_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
     conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False, index=True)
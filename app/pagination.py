@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+
+# Keyset ("seek") pagination helpers.
+# The cursor is an opaque, URL-safe token encoding the (timestamp, id) of the last row
+# the client received. The next page is returned in the `X-Next-Cursor` response header,
+# so endpoints that return a plain JSON list keep their response shape.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        timestamp, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def seek_before(timestamp_col, id_col, cursor: str | None):
+    """WHERE clause for rows after `cursor` in `ORDER BY timestamp DESC, id DESC` order."""
+    if not cursor:
+        return None
+    timestamp, row_id = decode_cursor(cursor)
+    # The leading `<=` is redundant logically but gives the planner a range bound,
+    # so deep pages seek into the (..., timestamp) index instead of walking up to the cursor.
+    return and_(
+        timestamp_col <= timestamp,
+        or_(timestamp_col < timestamp, id_col < row_id),
+    )
@@ -1,16 +1,19 @@
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_, func
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_
 
 from ..deps import get_db, get_current_user
 from ..models import (
-    UserRole, Application, Conversation, Message,
-    MessageType, ApplicationStatus, InternshipPost, User,
-    ConversationParticipant,
+    UserRole, Decision, Application, Conversation,
+    ApplicationStatus, InternshipPost, User,
+    ConversationParticipant, CompanyProfile,
 )
-from ..schemas import ApplicationListItem, SetApplicationStatusRequest
+from ..schemas import ApplicationListItem, OpenConversationResponse, SetApplicationStatusRequest
 from ..url_utils import to_public_url
+from ..chat_hub import publish_system_message
+from ..messaging import open_conversation
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, encode_cursor, seek_before
+from .interaction_routes import append_decision_event, decision_projector, latest_application_event
 
 router = APIRouter(prefix="/applications", tags=["applications"])
 
@@ -30,108 +33,95 @@ def status_to_system_text(status: ApplicationStatus) -> str:
 @router.get("", response_model=list[ApplicationListItem])
 def list_applications(
     request: Request,
+    response: Response,
+    status: ApplicationStatus | None = None,
+    post_id: int | None = None,
+    unread_only: bool = False,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current=Depends(get_current_user),
 ):
     """
-    Get all applications for current user.
+    Get the applications of the current user, most recently updated first.
     
-    Returns applications with conversation details, decisions, and deduplication.
-    Filters out duplicate applications for the same conversation/participants.
+    Returns applications with conversation details and decisions. There is one application
+    per (post, student) (uq_post_student_application) and one conversation per application,
+    so no deduplication is needed.
+
+    The whole page is one set-based query over applications, conversations and the
+    participant row: the last message and the unread count are stored on those
+    (see app/messaging.py), so the messages table is never read. Paginated on (updated_at, id); the next page's
+    cursor is returned in the X-Next-Cursor header.
     """
     # Student: applications where student_user_id = current
     # Company: applications where company_user_id = current
-    q = db.query(Application)
     if current.role == UserRole.STUDENT:
-        q = q.filter(Application.student_user_id == current.id)
+        own_filter = Application.student_user_id == current.id
+        other_user_id = Application.company_user_id
     else:
-        q = q.filter(Application.company_user_id == current.id)
-
-    apps = q.order_by(Application.updated_at.desc()).all()
-
-    # Deduplication: track seen conversation IDs and participant pairs
-    seen_conversations = set()
-    seen_participants = set()
-    out = []
-    
-    for a in apps:
-        conv = db.query(Conversation).filter(Conversation.application_id == a.id).first()
-        
-        # Deduplication check
-        if conv:
-            if conv.id in seen_conversations:
-                continue
-            seen_conversations.add(conv.id)
-        
-        # Also deduplicate by participant pair + post (in case of missing conversation)
-        participant_key = (
-            min(a.student_user_id, a.company_user_id),
-            max(a.student_user_id, a.company_user_id),
-            a.post_id
-        )
-        if participant_key in seen_participants:
-            continue
-        seen_participants.add(participant_key)
-        
-        # Skip if no conversation exists
-        if not conv:
-            continue
-
-        # Backfill participant state for existing conversations
-        part = (
-            db.query(ConversationParticipant)
-            .filter(
-                ConversationParticipant.conversation_id == conv.id,
-                ConversationParticipant.user_id == current.id,
-            )
-            .first()
-        )
-        if not part:
-            last_msg_id = (
-                db.query(func.max(Message.id))
-                .filter(Message.conversation_id == conv.id)
-                .scalar()
-            )
-            part = ConversationParticipant(
-                conversation_id=conv.id,
-                user_id=current.id,
-                last_read_message_id=last_msg_id,
-                updated_at=datetime.utcnow(),
-            )
-            db.add(part)
-            db.flush()
-
-        last_msg = (
-            db.query(Message)
-            .filter(Message.conversation_id == conv.id)
-            .order_by(desc(Message.created_at))
-            .first()
-        )
-
-        threshold = part.last_read_message_id or 0
-        unread_count = (
-            db.query(func.count(Message.id))
-            .filter(Message.conversation_id == conv.id)
-            .filter(Message.id > threshold)
-            .filter(Message.sender_user_id.isnot(None))
-            .filter(Message.sender_user_id != current.id)
-            .scalar()
-            or 0
+        own_filter = Application.company_user_id == current.id
+        other_user_id = Application.student_user_id
+
+    # The current user's participant row carries the stored unread count.
+    me = aliased(ConversationParticipant)
+
+    other = aliased(User)
+    query = (
+        db.query(
+            Application,
+            Conversation.id,
+            InternshipPost.title,
+            other,
+            CompanyProfile.company_name,
+            Conversation.last_message_id,
+            Conversation.last_message_preview,
+            Conversation.last_message_at,
+            me.unread_count,
         )
+        # Conversations are opened lazily (on a match / from the chat), so they may be missing.
+        .outerjoin(Conversation, Conversation.application_id == Application.id)
+        .outerjoin(InternshipPost, InternshipPost.id == Application.post_id)
+        .outerjoin(other, other.id == other_user_id)
+        .outerjoin(CompanyProfile, CompanyProfile.user_id == other.id)
+        .outerjoin(me, and_(me.conversation_id == Conversation.id, me.user_id == current.id))
+        .filter(own_filter)
+    )
+
+    if status is not None:
+        query = query.filter(Application.status == status)
+    if post_id is not None:
+        query = query.filter(Application.post_id == post_id)
+    if unread_only:
+        query = query.filter(me.unread_count > 0)
+    after = seek_before(Application.updated_at, Application.id, cursor)
+    if after is not None:
+        query = query.filter(after)
+
+    # Fetch one extra row to know whether another page exists.
+    rows = (
+        query
+        .order_by(Application.updated_at.desc(), Application.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.updated_at, last.id)
 
-        post = db.get(InternshipPost, a.post_id)
-        post_title = post.title if post else "Internship"
+    out = []
+    for a, conv_id, post_title, other_party, company_name, last_msg_id, last_msg_text, last_msg_at, unread_count in rows:
+        post_title = post_title or "Internship"
 
         # other party display name and profile image
         if current.role == UserRole.STUDENT:
-            other_party = db.get(User, a.company_user_id)
-            other_name = other_party.company_profile.company_name if other_party and other_party.company_profile and other_party.company_profile.company_name else (other_party.username if other_party else "Company")
+            other_name = company_name or (other_party.username if other_party else "Company")
         else:
-            other_party = db.get(User, a.student_user_id)
             other_name = other_party.username if other_party else "Student"
-        
+
         other_party_profile_image = to_public_url(other_party.profile_image_url if other_party else None, request)
-        
+
         # Convert Decision enums to string for response
         student_decision_str = a.student_decision.value if a.student_decision else None
         company_decision_str = a.company_decision.value if a.company_decision else None
@@ -139,7 +129,7 @@ def list_applications(
         out.append(ApplicationListItem(
             applicationId=a.id,
             status=a.status,
-            conversationId=conv.id if conv else None,
+            conversationId=conv_id,
             postId=a.post_id,
             postTitle=post_title,
             studentUserId=a.student_user_id,
@@ -148,16 +138,16 @@ def list_applications(
             companyDecision=company_decision_str,
             otherPartyName=other_name,
             otherPartyProfileImageUrl=other_party_profile_image,
-            lastMessage=last_msg.text if last_msg else None,
-            unreadCount=int(unread_count),
-            lastMessageId=last_msg.id if last_msg else None,
-            lastMessageAt=last_msg.created_at if last_msg else None,
+            # No conversation yet: the status line its first system message would have.
+            lastMessage=last_msg_text if conv_id is not None else status_to_system_text(a.status),
+            unreadCount=int(unread_count or 0),
+            lastMessageId=last_msg_id,
+            lastMessageAt=last_msg_at,
             internshipTitle=post_title,
             createdAt=a.created_at,
             updatedAt=a.updated_at,
         ))
 
-    db.commit()
     return out
 
 
@@ -165,9 +155,16 @@ def list_applications(
 def set_application_status(
     application_id: int,
     req: SetApplicationStatusRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current=Depends(get_current_user),
 ):
+    """
+    Company sets the status of one of its applications.
+
+    The status is logged to decision_events as an explicit override, so rebuilds keep it;
+    the projector applies it as-is (decisions untouched) right after the response.
+    """
     app = db.get(Application, application_id)
     if not app:
         raise HTTPException(status_code=404, detail="Application not found")
@@ -183,24 +180,46 @@ def set_application_status(
     else:
         new_status = ApplicationStatus(req.status)
 
-    # If already that status, do nothing
-    if app.status == new_status:
+    # If already that status, do nothing. While the application's latest event is still
+    # pending, app.status is stale: compare with the status that event asks for instead.
+    latest = latest_application_event(db, app.student_user_id, app.post_id)
+    current_status = latest.status if latest is not None and latest.projected_at is None else app.status
+    if current_status == new_status:
         return {"ok": True}
 
-    app.status = new_status
-    app.updated_at = datetime.utcnow()
+    append_decision_event(
+        db,
+        actor_role=UserRole.COMPANY,
+        student_user_id=app.student_user_id,
+        company_user_id=app.company_user_id,
+        post_id=app.post_id,
+        decision=Decision.NONE,
+        status=new_status,
+    )
+    db.commit()
+    background_tasks.add_task(decision_projector.run, db.get_bind())
+    return {"ok": True}
 
-    conv = db.query(Conversation).filter(Conversation.application_id == app.id).first()
-    if not conv:
-        raise HTTPException(status_code=500, detail="Conversation missing")
 
-    system_text = status_to_system_text(new_status)
-    db.add(Message(
-        conversation_id=conv.id,
-        type=MessageType.SYSTEM,
-        sender_user_id=None,
-        text=system_text,
-    ))
+@router.post("/{application_id}/conversation", response_model=OpenConversationResponse)
+def open_application_conversation(
+    application_id: int,
+    db: Session = Depends(get_db),
+    current=Depends(get_current_user),
+):
+    """
+    Open the chat of an application: returns its conversation, creating it on first use
+    (applications only get one automatically when they are ACCEPTED).
+    """
+    app = db.get(Application, application_id)
+    if not app:
+        raise HTTPException(status_code=404, detail="Application not found")
+    if current.id not in (app.student_user_id, app.company_user_id):
+        raise HTTPException(status_code=403, detail="No access")
 
+    conv, system_msg = open_conversation(db, app, status_to_system_text(app.status))
+    conversation_id = conv.id
     db.commit()
-    return {"ok": True}
+    if system_msg is not None:
+        publish_system_message(system_msg)
+    return OpenConversationResponse(conversationId=conversation_id)
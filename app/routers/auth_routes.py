@@ -8,6 +8,8 @@ from ..models import User, UserRole, StudentProfile, CompanyProfile, StudentProf
 from ..schemas import RegisterRequest, LoginRequest, TokenResponse, MeResponse, UpdateMeRequest
 from ..auth import hash_password, verify_password, create_access_token
 from ..url_utils import to_public_url
+from ..departments import department_key
+from ..feed_cache import invalidate_company_feeds
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -39,6 +41,8 @@ def register(req: RegisterRequest, db: Session = Depends(get_db)):
         db.add(CompanyProfile(user_id=user.id))
 
     db.commit()
+    if req.role == UserRole.STUDENT:
+        invalidate_company_feeds()
 
     token = create_access_token(user.id)
     return TokenResponse(access_token=token)
@@ -147,6 +151,9 @@ def update_me(
 
     db.commit()
     db.refresh(current)
+    if current.role == UserRole.STUDENT:
+        # The profile post's updated_at moved: PASSed cards re-appear in company feeds.
+        invalidate_company_feeds()
 
     return MeResponse(
         id=current.id,
@@ -205,6 +212,7 @@ def _ensure_student_profile_post(db: Session, user: User, sp: StudentProfile | N
             title=title,
             description=description,
             location=None,
+            department_key=department_key(sp.department if sp else None),
             is_active=True,
             updated_at=datetime.utcnow(),
         )
@@ -212,6 +220,7 @@ def _ensure_student_profile_post(db: Session, user: User, sp: StudentProfile | N
     else:
         spost.title = title
         spost.description = description
+        spost.department_key = department_key(sp.department if sp else None)
         spost.updated_at = datetime.utcnow()
 
     db.flush()
@@ -1,73 +1,72 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+import asyncio
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import asc, func
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import func, select
 from datetime import datetime
 
-from ..deps import get_db, get_current_user
-from ..models import Conversation, Message, MessageType, Application, UserRole, ApplicationStatus, ConversationParticipant, User
-from ..schemas import MessageResponse, MessageSender, SendMessageRequest, MarkConversationReadRequest, MarkConversationReadResponse
+from ..deps import get_db, get_current_user, user_from_token
+from ..models import Conversation, Message, MessageType, Application, UserRole, ApplicationStatus, ConversationParticipant, User, CompanyProfile
+from ..schemas import (
+    MessageResponse, MessageSender, SendMessageRequest,
+    MarkConversationReadRequest, MarkConversationReadItem, MarkConversationReadResponse,
+    ConversationUnreadCount, UnreadSummaryResponse,
+)
 from ..url_utils import to_public_url
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..chat_hub import chat_hub
+from ..messaging import add_message
+from ..membership_cache import membership_cache
 
 router = APIRouter(prefix="/conversations", tags=["chat"])
 
-
-def can_access_conversation(db: Session, conv_id: int, user_id: int) -> bool:
-    conv = db.get(Conversation, conv_id)
-    if not conv:
-        return False
-    app = db.get(Application, conv.application_id)
-    if not app:
-        return False
-    return app.student_user_id == user_id or app.company_user_id == user_id
+DEFAULT_POLL_TIMEOUT_SECONDS = 25.0
+MAX_POLL_TIMEOUT_SECONDS = 60.0
 
 
-def _ensure_participant(
-    db: Session,
-    *,
-    conversation_id: int,
-    user_id: int,
-    seed_last_read_to_last_message: bool,
-) -> ConversationParticipant:
-    row = (
-        db.query(ConversationParticipant)
+def can_access_conversation(db: Session, conv_id: int, user_id: int) -> bool:
+    """
+    The student and company of a conversation's application are its participants
+    (see migrations.ensure_conversation_participants), so access is one lookup on
+    the (conversation_id, user_id) unique index, cached in-process once granted.
+    """
+    if membership_cache.contains(conv_id, user_id):
+        return True
+    is_member = (
+        db.query(ConversationParticipant.id)
         .filter(
-            ConversationParticipant.conversation_id == conversation_id,
+            ConversationParticipant.conversation_id == conv_id,
             ConversationParticipant.user_id == user_id,
         )
         .first()
-    )
-    if row:
-        return row
-
-    last_msg_id = None
-    if seed_last_read_to_last_message:
-        last_msg_id = (
-            db.query(func.max(Message.id))
-            .filter(Message.conversation_id == conversation_id)
-            .scalar()
-        )
+    ) is not None
+    if is_member:
+        membership_cache.add(conv_id, user_id)
+    return is_member
 
-    row = ConversationParticipant(
-        conversation_id=conversation_id,
-        user_id=user_id,
-        last_read_message_id=last_msg_id,
-        updated_at=datetime.utcnow(),
+
+@router.get("/unread-summary", response_model=UnreadSummaryResponse)
+def unread_summary(
+    db: Session = Depends(get_db),
+    current=Depends(get_current_user),
+):
+    """Total unread badge + per-conversation counts, read from the stored participant counters."""
+    rows = (
+        db.query(ConversationParticipant.conversation_id, ConversationParticipant.unread_count)
+        .filter(
+            ConversationParticipant.user_id == current.id,
+            ConversationParticipant.unread_count > 0,
+        )
+        .order_by(ConversationParticipant.conversation_id)
+        .all()
     )
-    db.add(row)
-    db.flush()
-    return row
-
-
-def _unread_count(db: Session, *, conversation_id: int, user_id: int, last_read_message_id: int | None) -> int:
-    threshold = last_read_message_id or 0
-    return (
-        db.query(func.count(Message.id))
-        .filter(Message.conversation_id == conversation_id)
-        .filter(Message.id > threshold)
-        .filter(Message.sender_user_id.isnot(None))
-        .filter(Message.sender_user_id != user_id)
-        .scalar()
-        or 0
+    return UnreadSummaryResponse(
+        totalUnread=sum(count for _, count in rows),
+        conversations=[
+            ConversationUnreadCount(conversationId=conv_id, unreadCount=count)
+            for conv_id, count in rows
+        ],
     )
 
 
@@ -75,21 +74,78 @@ def _unread_count(db: Session, *, conversation_id: int, user_id: int, last_read_
 def get_messages(
     conversation_id: int,
     request: Request,
+    before_id: int | None = None,
+    after_id: int | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current=Depends(get_current_user),
 ):
+    """
+    Messages of a conversation, oldest first, paged by message id.
+
+    - no params: the latest `limit` messages
+    - before_id: the `limit` messages right before it (scrolling up)
+    - after_id: the first `limit` messages after it (catching up)
+    """
     if not can_access_conversation(db, conversation_id, current.id):
         raise HTTPException(status_code=403, detail="No access")
 
-    msgs = (
-        db.query(Message)
-        .filter(Message.conversation_id == conversation_id)
-        .order_by(asc(Message.created_at))
-        .all()
-    )
-    app = db.get(Application, db.get(Conversation, conversation_id).application_id)
+    query = db.query(Message).filter(Message.conversation_id == conversation_id)
+    if before_id is not None:
+        query = query.filter(Message.id < before_id)
+    if after_id is not None:
+        query = query.filter(Message.id > after_id)
 
-    return [_message_to_response(m, app, db, request, requester_user_id=current.id) for m in msgs]
+    if after_id is not None:
+        msgs = query.order_by(Message.id.asc()).limit(limit).all()
+    else:
+        msgs = query.order_by(Message.id.desc()).limit(limit).all()
+        msgs.reverse()
+    senders = _resolve_senders(db, conversation_id, request)
+
+    return [_message_to_response(m, senders, requester_user_id=current.id) for m in msgs]
+
+
+@router.get("/{conversation_id}/messages/poll", response_model=list[MessageResponse])
+async def poll_messages(
+    conversation_id: int,
+    request: Request,
+    after_id: int,
+    timeout: float = Query(DEFAULT_POLL_TIMEOUT_SECONDS, ge=0, le=MAX_POLL_TIMEOUT_SECONDS),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current=Depends(get_current_user),
+):
+    """
+    Long-poll variant of GET .../messages?after_id= for clients that cannot keep a WebSocket.
+
+    Returns at once if there are messages after `after_id`; otherwise waits up to `timeout`
+    seconds for one to be sent and returns it, or returns [] on timeout (poll again).
+    """
+    def load():
+        try:
+            return get_messages(
+                conversation_id, request, before_id=None, after_id=after_id, limit=limit,
+                db=db, current=current,
+            )
+        finally:
+            # Hand the connection back to the pool; nothing is held while the client waits.
+            db.close()
+
+    # Subscribe before reading, so a message committed in between still wakes us.
+    sub = chat_hub.subscribe(conversation_id, current.id)
+    try:
+        msgs = await run_in_threadpool(load)
+        if msgs or timeout == 0:
+            return msgs
+
+        try:
+            await asyncio.wait_for(sub.get(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        return await run_in_threadpool(load)
+    finally:
+        chat_hub.unsubscribe(sub)
 
 
 @router.post("/{conversation_id}/messages", response_model=MessageResponse)
@@ -100,51 +156,145 @@ def send_message(
     db: Session = Depends(get_db),
     current=Depends(get_current_user),
 ):
-    conv = db.get(Conversation, conversation_id)
-    if not conv:
+    # Fast path: one SELECT for everything the checks and the response need, then
+    # INSERT message + UPDATE conversation + UPDATE participants (messaging.add_message), COMMIT.
+    row = (
+        db.query(
+            Application.student_user_id,
+            Application.company_user_id,
+            Application.status,
+            CompanyProfile.company_name,
+        )
+        .select_from(Conversation)
+        .outerjoin(Application, Application.id == Conversation.application_id)
+        .outerjoin(CompanyProfile, CompanyProfile.user_id == current.id)
+        .filter(Conversation.id == conversation_id)
+        .first()
+    )
+    if row is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    app = db.get(Application, conv.application_id)
-    if not app:
+    student_user_id, company_user_id, app_status, company_name = row
+    if student_user_id is None:
         raise HTTPException(status_code=500, detail="Application missing")
 
-    if not (app.student_user_id == current.id or app.company_user_id == current.id):
+    if not (student_user_id == current.id or company_user_id == current.id):
         raise HTTPException(status_code=403, detail="No access")
 
     # Optional rule: block chat if declined
-    if app.status == ApplicationStatus.DECLINED:
+    if app_status == ApplicationStatus.DECLINED:
         raise HTTPException(status_code=400, detail="Conversation declined")
 
-    msg = Message(
-        conversation_id=conversation_id,
-        type=MessageType.USER,
-        sender_user_id=current.id,
-        text=req.text,
+    # The sender is the current user; build their identity before the commit expires `current`.
+    is_company = current.id == company_user_id
+    sender = MessageSender(
+        id=current.id,
+        role=UserRole.COMPANY if is_company else UserRole.STUDENT,
+        name=(company_name or current.username) if is_company else current.username,
+        avatarUrl=to_public_url(current.profile_image_url, request),
     )
-    db.add(msg)
 
-    # Ensure participant rows exist (backfill) and mark sender as having read up to their own message.
-    _ensure_participant(db, conversation_id=conversation_id, user_id=current.id, seed_last_read_to_last_message=True)
-    app_other_id = app.company_user_id if app.student_user_id == current.id else app.student_user_id
-    _ensure_participant(db, conversation_id=conversation_id, user_id=app_other_id, seed_last_read_to_last_message=True)
+    # Participant rows exist for every conversation (see migrations.ensure_conversation_participants).
+    msg = add_message(db, conversation_id=conversation_id, sender_user_id=current.id, text=req.text)
+    response = _message_to_response(msg, {current.id: sender}, requester_user_id=current.id)
 
-    db.flush()  # populate msg.id
+    db.commit()
+    chat_hub.publish(conversation_id, response)
+    return response
 
-    sender_part = (
-        db.query(ConversationParticipant)
-        .filter(
-            ConversationParticipant.conversation_id == conversation_id,
-            ConversationParticipant.user_id == current.id,
-        )
-        .first()
-    )
-    if sender_part:
-        sender_part.last_read_message_id = msg.id
-        sender_part.updated_at = datetime.utcnow()
 
+@router.websocket("/{conversation_id}/ws")
+async def conversation_ws(
+    websocket: WebSocket,
+    conversation_id: int,
+    token: str | None = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Push new messages of a conversation as they are sent (same payload as GET .../messages).
+
+    Auth: the usual JWT, as `?token=...` (browsers cannot set headers on WebSockets)
+    or as an `Authorization: Bearer ...` header. The socket is server → client only;
+    after a reconnect, fetch what was missed with GET .../messages?after_id=.
+    """
+    if token is None:
+        scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer":
+            token = credentials
+
+    def authorize() -> int | None:
+        try:
+            user = user_from_token(db, token or "")
+            if not can_access_conversation(db, conversation_id, user.id):
+                return None
+            return user.id
+        except HTTPException:
+            return None
+        finally:
+            # An idle socket must not hold a DB connection.
+            db.close()
+
+    user_id = await run_in_threadpool(authorize)
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    sub = chat_hub.subscribe(conversation_id, user_id)
+
+    async def push():
+        try:
+            while True:
+                message = await sub.get()
+                if message is None:
+                    # Fell behind; the client reconnects and refetches with after_id.
+                    await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                    return
+                await websocket.send_json(message.model_dump(mode="json", by_alias=True))
+        except (WebSocketDisconnect, RuntimeError):
+            # The client went away mid-send.
+            return
+
+    async def drain():
+        # Incoming frames are ignored; this only notices the client going away.
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.create_task(push()), asyncio.create_task(drain())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        chat_hub.unsubscribe(sub)
+
+
+MAX_READ_BATCH = 100
+
+
+@router.post("/read", response_model=list[MarkConversationReadResponse])
+def mark_conversations_read(
+    req: list[MarkConversationReadItem] = Body(..., max_length=MAX_READ_BATCH),
+    db: Session = Depends(get_db),
+    current=Depends(get_current_user),
+):
+    """
+    Batch version of POST /conversations/{id}/read ("mark all as read").
+
+    Same rules per item; all items are applied in one transaction, or none if any is invalid.
+    """
+    targets = {}
+    for item in req:
+        if item.conversationId in targets:
+            raise HTTPException(status_code=400, detail="Duplicate conversationId")
+        targets[item.conversationId] = item.lastReadMessageId
+
+    results = _mark_read(db, user_id=current.id, targets=targets)
     db.commit()
-    db.refresh(msg)
-    return _message_to_response(msg, app, db, request, requester_user_id=current.id)
+    return results
 
 
 @router.post("/{conversation_id}/read", response_model=MarkConversationReadResponse)
@@ -154,85 +304,142 @@ def mark_conversation_read(
     db: Session = Depends(get_db),
     current=Depends(get_current_user),
 ):
-    if not can_access_conversation(db, conversation_id, current.id):
-        raise HTTPException(status_code=403, detail="No access")
+    (result,) = _mark_read(db, user_id=current.id, targets={conversation_id: req.lastReadMessageId})
+    db.commit()
+    return result
 
-    # Backfill participant row for existing conversations. We DO NOT auto-seed to last message here,
-    # because this endpoint is called when the user actually opens the chat.
-    part = _ensure_participant(db, conversation_id=conversation_id, user_id=current.id, seed_last_read_to_last_message=False)
 
-    target_id = None
-    if req.lastReadMessageId is not None:
-        m = db.get(Message, req.lastReadMessageId)
-        if not m or m.conversation_id != conversation_id:
-            raise HTTPException(status_code=400, detail="Invalid lastReadMessageId")
-        target_id = m.id
-    else:
-        target_id = (
-            db.query(func.max(Message.id))
-            .filter(Message.conversation_id == conversation_id)
-            .scalar()
+def _mark_read(db: Session, *, user_id: int, targets: dict[int, int | None]) -> list[MarkConversationReadResponse]:
+    """
+    Move the user's read pointers: conversation id -> lastReadMessageId (None = the latest message).
+
+    Everything is validated before anything is written: 403 if the user is not a participant
+    of one of the conversations, 400 if a lastReadMessageId belongs to another conversation.
+    """
+    # Authorization and the "latest message" targets in one query.
+    rows = (
+        db.query(ConversationParticipant, Conversation.last_message_id)
+        .join(Conversation, Conversation.id == ConversationParticipant.conversation_id)
+        .filter(
+            ConversationParticipant.user_id == user_id,
+            ConversationParticipant.conversation_id.in_(targets),
         )
+        .all()
+    )
+    parts = {part.conversation_id: (part, last_message_id) for part, last_message_id in rows}
+    if len(parts) != len(targets):
+        raise HTTPException(status_code=403, detail="No access")
 
-    # If there are no messages yet, keep last_read_message_id as-is.
-    if target_id is not None:
+    explicit_ids = {message_id for message_id in targets.values() if message_id is not None}
+    owners = {}
+    if explicit_ids:
+        owners = dict(
+            db.query(Message.id, Message.conversation_id)
+            .filter(Message.id.in_(explicit_ids))
+            .all()
+        )
+    for conversation_id, message_id in targets.items():
+        if message_id is not None and owners.get(message_id) != conversation_id:
+            raise HTTPException(status_code=400, detail="Invalid lastReadMessageId")
+
+    now = datetime.utcnow()
+    recount = []
+    for conversation_id, message_id in targets.items():
+        part, last_message_id = parts[conversation_id]
+        target_id = message_id if message_id is not None else last_message_id
+
+        # If there are no messages yet, keep last_read_message_id as-is.
+        if target_id is None:
+            continue
         part.last_read_message_id = target_id
-        part.updated_at = datetime.utcnow()
+        part.updated_at = now
+        if target_id == last_message_id:
+            part.unread_count = 0
+        else:
+            recount.append(part)
+
+    if recount:
+        # Partial reads: recount what is left after the new pointers, in one statement.
+        db.flush()
+        unread = (
+            select(func.count(Message.id))
+            .where(
+                Message.conversation_id == ConversationParticipant.conversation_id,
+                Message.id > ConversationParticipant.last_read_message_id,
+                Message.sender_user_id.isnot(None),
+                Message.sender_user_id != ConversationParticipant.user_id,
+            )
+            .scalar_subquery()
+        )
+        (
+            db.query(ConversationParticipant)
+            .filter(ConversationParticipant.id.in_([part.id for part in recount]))
+            .update({ConversationParticipant.unread_count: unread}, synchronize_session=False)
+        )
+        counts = dict(
+            db.query(ConversationParticipant.id, ConversationParticipant.unread_count)
+            .filter(ConversationParticipant.id.in_([part.id for part in recount]))
+            .all()
+        )
+        for part in recount:
+            set_committed_value(part, "unread_count", counts[part.id])
+
+    return [
+        MarkConversationReadResponse(
+            conversationId=conversation_id,
+            unreadCount=parts[conversation_id][0].unread_count,
+            lastReadMessageId=parts[conversation_id][0].last_read_message_id,
+        )
+        for conversation_id in targets
+    ]
 
-    db.commit()
 
-    return MarkConversationReadResponse(
-        conversationId=conversation_id,
-        unreadCount=0,
-        lastReadMessageId=part.last_read_message_id,
+def _resolve_senders(db: Session, conversation_id: int, request: Request) -> dict[int, MessageSender]:
+    """Sender identity of the conversation's participants, loaded in one query."""
+    rows = (
+        db.query(User, CompanyProfile.company_name)
+        .join(ConversationParticipant, ConversationParticipant.user_id == User.id)
+        .outerjoin(CompanyProfile, CompanyProfile.user_id == User.id)
+        .filter(ConversationParticipant.conversation_id == conversation_id)
+        .all()
     )
 
+    senders = {}
+    for user, company_name in rows:
+        if user.role == UserRole.COMPANY:
+            name = company_name or user.username
+        else:
+            name = user.username
+        senders[user.id] = MessageSender(
+            id=user.id,
+            role=user.role,
+            name=name,
+            avatarUrl=to_public_url(user.profile_image_url, request),
+        )
+    return senders
+
 
 def _message_to_response(
     m: Message,
-    app: Application,
-    db: Session,
-    request: Request,
+    senders: dict[int, MessageSender],
     *,
     requester_user_id: int | None = None,
 ) -> MessageResponse:
-    sender_role = None
-    sender_user = None
-    sender_name = None
-    sender_profile_image_url = None
-    
-    if m.sender_user_id is None:
-        sender_role = None
-    elif m.sender_user_id == app.company_user_id:
-        sender_role = UserRole.COMPANY
-        sender_user = db.get(User, m.sender_user_id)
-        if sender_user:
-            if sender_user.company_profile and sender_user.company_profile.company_name:
-                sender_name = sender_user.company_profile.company_name
-            else:
-                sender_name = sender_user.username
-            sender_profile_image_url = to_public_url(sender_user.profile_image_url, request)
-    elif m.sender_user_id == app.student_user_id:
-        sender_role = UserRole.STUDENT
-        sender_user = db.get(User, m.sender_user_id)
-        if sender_user:
-            sender_name = sender_user.username
-            sender_profile_image_url = to_public_url(sender_user.profile_image_url, request)
-
     sender_id = m.sender_user_id
+    sender_obj = senders.get(sender_id) if sender_id is not None else None
+
+    # A sender that is neither participant (or a deleted user) keeps its id but no identity.
+    if sender_id is not None and sender_obj is None:
+        sender_obj = MessageSender(id=sender_id, role=None, name=None, avatarUrl=None)
+
+    sender_role = sender_obj.role if sender_obj else None
+    sender_name = sender_obj.name if sender_obj else None
+    sender_profile_image_url = sender_obj.avatarUrl if sender_obj else None
+
     is_mine = None
     if requester_user_id is not None and sender_id is not None:
         is_mine = sender_id == requester_user_id
 
-    sender_obj = None
-    if sender_id is not None:
-        sender_obj = MessageSender(
-            id=sender_id,
-            role=sender_role,
-            name=sender_name,
-            avatarUrl=sender_profile_image_url,
-        )
-
     return MessageResponse(
         id=m.id,
         type=m.type,
@@ -1,6 +1,6 @@
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
@@ -20,43 +20,58 @@ from ..models import (
 )
 from ..schemas import PostResponse, StudentProfilePostResponse
 from ..url_utils import to_public_url
-from ..departments import normalize_department
+from ..departments import department_key, normalize_department
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, encode_cursor, seek_before
+from ..feed_cache import feed_cache
 
 router = APIRouter(prefix="/feed", tags=["feed"])
 
 logger = logging.getLogger(__name__)
 
 
+def _candidate_page(query, created_col, id_col, cursor: str | None, limit: int) -> tuple[list[int], str | None]:
+    """Run a feed candidate query (selecting id, created_at) and return one page of IDs + next cursor."""
+    after = seek_before(created_col, id_col, cursor)
+    if after is not None:
+        query = query.filter(after)
+
+    # Fetch one extra row to know whether another page exists.
+    rows = (
+        query
+        .order_by(created_col.desc(), id_col.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return [row.id for row in rows], next_cursor
+
+
+def _cached_candidate_page(current, key, compute) -> tuple[list[int], str | None]:
+    """Serve a feed page's candidate IDs from feed_cache, computing them on a miss."""
+    page = feed_cache.get(current.role, current.id, key)
+    if page is None:
+        token = feed_cache.token(current.role, current.id)
+        page = compute()
+        feed_cache.put(current.role, current.id, key, page, token)
+    return page
+
+
 @router.get("/student", response_model=list[PostResponse])
 def student_feed(
     request: Request,
+    response: Response,
     department: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current=Depends(get_current_user),
 ):
     if current.role != UserRole.STUDENT:
         raise HTTPException(status_code=403, detail="Only students have this feed")
 
-    # Hide a post only if the student PASSed it, OR the company has responded to the Application
-    # (ACCEPTED/DECLINED). Otherwise keep it visible after LIKE until the other side reacts.
-    resolved_app_post_ids = (
-        db.query(Application.post_id)
-        .filter(Application.student_user_id == current.id)
-        .filter(Application.status != ApplicationStatus.PENDING)
-        .subquery()
-    )
-
-    interactions = (
-        db.query(StudentPostInteraction.post_id)
-        .join(InternshipPost, InternshipPost.id == StudentPostInteraction.post_id)
-        .filter(StudentPostInteraction.student_user_id == current.id)
-        .filter(
-            (StudentPostInteraction.decision == Decision.PASS)
-            | (InternshipPost.id.in_(resolved_app_post_ids))
-        )
-        .subquery()
-    )
-
     department_filter = normalize_department(department)
     logger.info(
         "/feed/student department=%r normalized=%r",
@@ -64,41 +79,70 @@ def student_feed(
         department_filter,
     )
 
-    posts_query = (
-        db.query(InternshipPost)
-        .filter(InternshipPost.is_active == True)
-        .filter(~InternshipPost.id.in_(interactions))
-    )
+    def candidates() -> tuple[list[int], str | None]:
+        # Hide a post only if the student PASSed it, OR the company has responded to the Application
+        # (ACCEPTED/DECLINED). Otherwise keep it visible after LIKE until the other side reacts.
+        resolved_app_post_ids = (
+            db.query(Application.post_id)
+            .filter(Application.student_user_id == current.id)
+            .filter(Application.status != ApplicationStatus.PENDING)
+            .subquery()
+        )
+
+        interactions = (
+            db.query(StudentPostInteraction.post_id)
+            .join(InternshipPost, InternshipPost.id == StudentPostInteraction.post_id)
+            .filter(StudentPostInteraction.student_user_id == current.id)
+            .filter(
+                (StudentPostInteraction.decision == Decision.PASS)
+                | (InternshipPost.id.in_(resolved_app_post_ids))
+            )
+            .subquery()
+        )
 
-    if department_filter:
-        posts_query = posts_query.filter(
-            func.trim(func.lower(InternshipPost.department)) == department_filter.lower()
+        posts_query = (
+            db.query(InternshipPost.id, InternshipPost.created_at)
+            .filter(InternshipPost.is_active == True)
+            .filter(~InternshipPost.id.in_(interactions))
         )
 
-    posts = (
-        posts_query
-        .order_by(InternshipPost.created_at.desc())
-        .limit(50)
+        if department_filter:
+            posts_query = posts_query.filter(InternshipPost.department_key == department_key(department_filter))
+
+        return _candidate_page(posts_query, InternshipPost.created_at, InternshipPost.id, cursor, limit)
+
+    post_ids, next_cursor = _cached_candidate_page(current, (department_filter, cursor, limit), candidates)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if not post_ids:
+        return []
+
+    # Company identity, avatar and the viewer's saved flag are joined in, so the whole deck
+    # is hydrated in a single query regardless of how many cards come back.
+    saved_rows = (
+        db.query(StudentPostInteraction.post_id, StudentPostInteraction.saved)
+        .filter(StudentPostInteraction.student_user_id == current.id)
+        .subquery()
+    )
+
+    rows = (
+        db.query(InternshipPost, User, CompanyProfile, saved_rows.c.saved)
+        .outerjoin(User, User.id == InternshipPost.company_user_id)
+        .outerjoin(CompanyProfile, CompanyProfile.user_id == InternshipPost.company_user_id)
+        .outerjoin(saved_rows, saved_rows.c.post_id == InternshipPost.id)
+        .filter(InternshipPost.id.in_(post_ids))
         .all()
     )
+    by_id = {row[0].id: row for row in rows}
 
     out = []
-    for p in posts:
-        company_name = None
-        cp = db.query(CompanyProfile).filter(CompanyProfile.user_id == p.company_user_id).first()
-        if cp and cp.company_name:
-            company_name = cp.company_name
-
-        company_user: User | None = db.query(User).filter(User.id == p.company_user_id).first()
+    for post_id in post_ids:
+        if post_id not in by_id:
+            continue
+        p, company_user, cp, is_saved = by_id[post_id]
+        company_name = cp.company_name if cp and cp.company_name else None
         company_profile_image_url = company_user.profile_image_url if company_user else None
 
-        # Check if post is saved by current student
-        interaction = db.query(StudentPostInteraction).filter(
-            StudentPostInteraction.student_user_id == current.id,
-            StudentPostInteraction.post_id == p.id
-        ).first()
-        is_saved = interaction.saved if interaction else False
-
         out.append(PostResponse(
             id=p.id,
             companyUserId=p.company_user_id,
@@ -114,7 +158,7 @@ def student_feed(
             location=p.location,
             department=p.department,
             imageUrl=to_public_url(p.image_url, request),
-            saved=is_saved,
+            saved=bool(is_saved),
             createdAt=p.created_at,
         ))
     return out
@@ -123,7 +167,10 @@ def student_feed(
 @router.get("/company", response_model=list[StudentProfilePostResponse])
 def company_feed(
     request: Request,
+    response: Response,
     department: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current=Depends(get_current_user),
 ):
@@ -134,80 +181,85 @@ def company_feed(
     if current.role != UserRole.COMPANY:
         raise HTTPException(status_code=403, detail="Only companies have this feed")
 
-    # For companies:
-    # - LIKE/PASS are stored on CompanyStudentPostInteraction.
-    # - PASS should hide only until the student updates their profile (StudentProfilePost.updated_at).
-    #   After profile changes, the card should re-appear so the company can re-evaluate.
-    student_decisions = (
-        db.query(StudentPostInteraction.student_user_id, StudentPostInteraction.post_id, StudentPostInteraction.decision)
-        .filter(StudentPostInteraction.decision != Decision.NONE)
-        .subquery()
+    department_filter = normalize_department(department)
+    logger.info(
+        "/feed/company department=%r normalized=%r",
+        department,
+        department_filter,
     )
 
-    decided = (
-        db.query(CompanyStudentPostInteraction.student_post_id)
-        .filter(CompanyStudentPostInteraction.company_user_id == current.id)
-        .filter(
-            # PASS hides only if it's "current" relative to the latest profile update.
-            (
-                (CompanyStudentPostInteraction.decision == Decision.PASS)
-                & (
-                    CompanyStudentPostInteraction.student_post_id.in_(
-                        db.query(StudentProfilePost.id)
-                        .filter(
-                            func.coalesce(StudentProfilePost.updated_at, StudentProfilePost.created_at)
-                            <= CompanyStudentPostInteraction.decided_at
-                        )
+    def candidates() -> tuple[list[int], str | None]:
+        # For companies:
+        # - LIKE/PASS are stored on CompanyStudentPostInteraction.
+        # - PASS should hide only until the student updates their profile (StudentProfilePost.updated_at).
+        #   After profile changes, the card should re-appear so the company can re-evaluate.
+        #
+        # Both checks below are correlated NOT EXISTS probes (one seek each per candidate card),
+        # so their cost does not follow the whole platform's activity.
+        student_decided = (
+            db.query(StudentPostInteraction.id)
+            .filter(StudentPostInteraction.student_user_id == StudentProfilePost.student_user_id)
+            .filter(StudentPostInteraction.decision != Decision.NONE)
+            .correlate(StudentProfilePost)
+            .exists()
+        )
+
+        decided = (
+            db.query(CompanyStudentPostInteraction.id)
+            .filter(CompanyStudentPostInteraction.company_user_id == current.id)
+            .filter(CompanyStudentPostInteraction.student_post_id == StudentProfilePost.id)
+            .filter(
+                # PASS hides only if it's "current" relative to the latest profile update.
+                (
+                    (CompanyStudentPostInteraction.decision == Decision.PASS)
+                    & (
+                        func.coalesce(StudentProfilePost.updated_at, StudentProfilePost.created_at)
+                        <= CompanyStudentPostInteraction.decided_at
                     )
                 )
-            )
-            |
-            # For any non-PASS decisions (i.e. LIKE), keep the previous behavior: hide only once the student has also decided.
-            (
-                (CompanyStudentPostInteraction.decision != Decision.NONE)
-                & (CompanyStudentPostInteraction.decision != Decision.PASS)
-                & (
-                    CompanyStudentPostInteraction.student_post_id.in_(
-                        db.query(StudentProfilePost.id)
-                        .join(student_decisions, student_decisions.c.student_user_id == StudentProfilePost.student_user_id)
-                    )
+                |
+                # LIKE hides only once the student has also decided (on any post).
+                (
+                    (CompanyStudentPostInteraction.decision == Decision.LIKE)
+                    & student_decided
                 )
             )
+            .correlate(StudentProfilePost)
+            .exists()
         )
-        .subquery()
-    )
 
-    department_filter = normalize_department(department)
-    logger.info(
-        "/feed/company department=%r normalized=%r",
-        department,
-        department_filter,
-    )
+        posts_query = (
+            db.query(StudentProfilePost.id, StudentProfilePost.created_at)
+            .filter(StudentProfilePost.is_active == True)
+            .filter(~decided)
+        )
 
-    posts_query = (
-        db.query(StudentProfilePost)
-        .filter(StudentProfilePost.is_active == True)
-        .filter(~StudentProfilePost.id.in_(decided))
-    )
+        if department_filter:
+            posts_query = posts_query.filter(StudentProfilePost.department_key == department_key(department_filter))
+
+        return _candidate_page(posts_query, StudentProfilePost.created_at, StudentProfilePost.id, cursor, limit)
 
-    if department_filter:
-        posts_query = posts_query.join(
-            StudentProfile,
-            StudentProfile.user_id == StudentProfilePost.student_user_id,
-        ).filter(func.trim(func.lower(StudentProfile.department)) == department_filter.lower())
+    post_ids, next_cursor = _cached_candidate_page(current, (department_filter, cursor, limit), candidates)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if not post_ids:
+        return []
 
-    posts = (
-        posts_query
-        .order_by(StudentProfilePost.created_at.desc())
-        .limit(50)
+    # Student identity and profile fields come from the same joined query as the cards.
+    rows = (
+        db.query(StudentProfilePost, User, StudentProfile)
+        .outerjoin(User, User.id == StudentProfilePost.student_user_id)
+        .outerjoin(StudentProfile, StudentProfile.user_id == StudentProfilePost.student_user_id)
+        .filter(StudentProfilePost.id.in_(post_ids))
         .all()
     )
+    by_id = {row[0].id: row for row in rows}
 
     out = []
-    for p in posts:
-        student_user: User | None = db.query(User).filter(User.id == p.student_user_id).first()
-        sp: StudentProfile | None = db.query(StudentProfile).filter(StudentProfile.user_id == p.student_user_id).first()
-
+    for post_id in post_ids:
+        if post_id not in by_id:
+            continue
+        p, student_user, sp = by_id[post_id]
         out.append(StudentProfilePostResponse(
             id=p.id,
             studentUserId=p.student_user_id,
@@ -1,5 +1,7 @@
+import threading
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from ..deps import get_db, get_current_user
@@ -7,12 +9,19 @@ from ..models import (
     UserRole, Decision,
     StudentPostInteraction,
     InternshipPost, Application, ApplicationStatus,
-    Conversation, Message, MessageType,
+    Message, MessageType,
     StudentProfilePost,
     CompanyStudentPostInteraction,
-    ConversationParticipant,
+    DecisionEvent,
 )
-from ..schemas import StudentDecisionRequest, CompanyDecisionStudentPostRequest, CompanyDecisionStudentRequest
+from ..schemas import (
+    StudentDecisionRequest, CompanyDecisionStudentPostRequest, CompanyDecisionStudentRequest,
+    DecisionBatchItem, DecisionBatchRequest, DecisionBatchResponse, DecisionBatchResult,
+)
+from ..feed_cache import invalidate_company_feeds, invalidate_match_feeds
+from ..chat_hub import chat_hub, system_message_response
+from ..messaging import add_message, open_conversation
+from ..upserts import upsert
 
 router = APIRouter(prefix="", tags=["interactions"])
 
@@ -51,31 +60,23 @@ def get_or_create_application(
     company_id: int,
     post_id: int,
 ) -> Application:
-    """Get existing application or create new one."""
-    app = (
-        db.query(Application)
-        .filter(
-            Application.post_id == post_id,
-            Application.student_user_id == student_id
-        )
-        .first()
-    )
-    
-    if not app:
-        app = Application(
+    """Get existing application or create new one (one upsert, safe against double taps)."""
+    now = datetime.utcnow()
+    return upsert(
+        db,
+        Application,
+        conflict=("post_id", "student_user_id"),
+        values=dict(
             post_id=post_id,
             student_user_id=student_id,
             company_user_id=company_id,
             student_decision=None,
             company_decision=None,
             status=ApplicationStatus.PENDING,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
-        )
-        db.add(app)
-        db.flush()
-    
-    return app
+            created_at=now,
+            updated_at=now,
+        ),
+    )
 
 
 def update_application_and_conversation(
@@ -83,11 +84,17 @@ def update_application_and_conversation(
     app: Application,
     student_decision: Decision | None = None,
     company_decision: Decision | None = None,
-) -> None:
+    status: ApplicationStatus | None = None,
+) -> Message | None:
     """
     Update application decisions and create/update conversation based on status.
     
-    Conversation is created ONLY when status becomes ACCEPTED (both LIKE).
+    Conversation is created ONLY when status becomes ACCEPTED (both LIKE, or set by the
+    company as `status`), unless it was already opened from the chat
+    (POST /applications/{id}/conversation).
+
+    Returns the system message added to the conversation, if any, so the caller can
+    publish it to live listeners once the transaction is committed.
     """
     # Update decisions if provided
     if student_decision is not None:
@@ -97,112 +104,336 @@ def update_application_and_conversation(
     
     # Calculate new status
     old_status = app.status
-    new_status = calculate_application_status(app.student_decision, app.company_decision)
+    new_status = status or calculate_application_status(app.student_decision, app.company_decision)
     app.status = new_status
     app.updated_at = datetime.utcnow()
     
-    # Get or create conversation if it doesn't exist
-    conv = db.query(Conversation).filter(Conversation.application_id == app.id).first()
-    
-    # Only create conversation when status changes or if it's the first action
-    if old_status != new_status or not conv:
-        if not conv:
-            # Create conversation on first action
-            conv = Conversation(application_id=app.id, created_at=datetime.utcnow())
-            db.add(conv)
-            db.flush()
-            
-            # Initialize participants with first system message
-            system_text = PENDING_TEXT if new_status == ApplicationStatus.PENDING else \
-                         ACCEPTED_TEXT if new_status == ApplicationStatus.ACCEPTED else \
-                         DECLINED_TEXT
-            
-            msg = Message(
-                conversation_id=conv.id,
-                type=MessageType.SYSTEM,
-                sender_user_id=None,
-                text=system_text,
-                created_at=datetime.utcnow(),
-            )
-            db.add(msg)
-            db.flush()
-            
-            # Create participant entries
-            for user_id in [app.student_user_id, app.company_user_id]:
-                db.add(ConversationParticipant(
-                    conversation_id=conv.id,
-                    user_id=user_id,
-                    last_read_message_id=msg.id,
-                    updated_at=datetime.utcnow(),
-                ))
-        else:
-            # Status changed - add system message
-            if old_status != new_status:
-                system_text = ACCEPTED_TEXT if new_status == ApplicationStatus.ACCEPTED else \
-                             DECLINED_TEXT if new_status == ApplicationStatus.DECLINED else \
-                             PENDING_TEXT
-                
-                msg = Message(
-                    conversation_id=conv.id,
-                    type=MessageType.SYSTEM,
-                    sender_user_id=None,
-                    text=system_text,
-                    created_at=datetime.utcnow(),
-                )
-                db.add(msg)
-    
+    conv = app.conversation
+    msg = None
+
+    if not conv:
+        # No conversation until there is a match (or someone opens the chat):
+        # /applications shows a synthesized status line for these.
+        if new_status == ApplicationStatus.ACCEPTED:
+            _, msg = open_conversation(db, app, ACCEPTED_TEXT)
+    elif old_status != new_status:
+        # Status changed - add system message
+        system_text = ACCEPTED_TEXT if new_status == ApplicationStatus.ACCEPTED else \
+                     DECLINED_TEXT if new_status == ApplicationStatus.DECLINED else \
+                     PENDING_TEXT
+
+        msg = add_message(db, conversation_id=conv.id, type=MessageType.SYSTEM, text=system_text)
+
     db.flush()
+    return msg
 
 
-def ensure_student_interaction_row(db: Session, student_user_id: int, post_id: int) -> StudentPostInteraction:
-    """Get or create student-post interaction row."""
-    row = (
-        db.query(StudentPostInteraction)
-        .filter(
-            StudentPostInteraction.student_user_id == student_user_id,
-            StudentPostInteraction.post_id == post_id
-        )
-        .first()
+def ensure_student_interaction_row(db: Session, student_user_id: int, post_id: int, **changes) -> StudentPostInteraction:
+    """Get or create student-post interaction row, writing `changes` (e.g. decision) in the same statement."""
+    return upsert(
+        db,
+        StudentPostInteraction,
+        conflict=("student_user_id", "post_id"),
+        values=dict(student_user_id=student_user_id, post_id=post_id, **changes),
+        update=changes,
     )
-    if not row:
-        row = StudentPostInteraction(
-            student_user_id=student_user_id,
-            post_id=post_id,
-            decision=Decision.NONE,
-        )
-        db.add(row)
-        db.flush()
-    return row
 
 
 def ensure_company_studentpost_interaction(
     db: Session,
     company_user_id: int,
-    student_post_id: int
+    student_post_id: int,
+    **changes,
 ) -> CompanyStudentPostInteraction:
-    """Get or create company-student post interaction row."""
-    row = (
-        db.query(CompanyStudentPostInteraction)
+    """Get or create company-student post interaction row, writing `changes` in the same statement."""
+    return upsert(
+        db,
+        CompanyStudentPostInteraction,
+        conflict=("company_user_id", "student_post_id"),
+        values=dict(company_user_id=company_user_id, student_post_id=student_post_id, **changes),
+        update=changes,
+    )
+
+
+def latest_company_student_application(db: Session, company_user_id: int, student_user_id: int) -> Application | None:
+    """Most recently updated application between a company and a student (one seek on ix_applications_company_student_updated)."""
+    return (
+        db.query(Application)
         .filter(
-            CompanyStudentPostInteraction.company_user_id == company_user_id,
-            CompanyStudentPostInteraction.student_post_id == student_post_id,
+            Application.company_user_id == company_user_id,
+            Application.student_user_id == student_user_id,
         )
+        .order_by(Application.updated_at.desc(), Application.id.desc())
         .first()
     )
-    if not row:
-        row = CompanyStudentPostInteraction(
-            company_user_id=company_user_id,
-            student_post_id=student_post_id,
-            decision=Decision.NONE,
+
+
+def latest_application_event(db: Session, student_user_id: int, post_id: int) -> DecisionEvent | None:
+    """Most recently logged event of an application (one seek on ix_decision_events_student_post)."""
+    return (
+        db.query(DecisionEvent)
+        .filter(DecisionEvent.student_user_id == student_user_id, DecisionEvent.post_id == post_id)
+        .order_by(DecisionEvent.id.desc())
+        .first()
+    )
+
+
+def latest_active_company_post(db: Session, company_user_id: int) -> InternshipPost | None:
+    """The company's most recent active post (one seek on ix_internship_posts_company_active_created)."""
+    return (
+        db.query(InternshipPost)
+        .filter(
+            InternshipPost.company_user_id == company_user_id,
+            InternshipPost.is_active == True
+        )
+        .order_by(InternshipPost.created_at.desc(), InternshipPost.id.desc())
+        .first()
+    )
+
+
+PROJECTOR_CHUNK_SIZE = 500
+REBUILD_CHUNK_SIZE = 500
+
+
+def append_decision_event(db: Session, **fields) -> DecisionEvent:
+    """Append a decision to the log (inserted with the rest of the transaction)."""
+    event = DecisionEvent(created_at=datetime.utcnow(), **fields)
+    db.add(event)
+    return event
+
+
+def append_decision_events(db: Session, rows: list[dict]) -> list[int]:
+    """
+    Append several decisions (same columns each) to the log with one INSERT.
+    Returns the new event ids, in the order of `rows`.
+    """
+    if not rows:
+        return []
+    now = datetime.utcnow()
+    # Ids autoincrement in VALUES order; RETURNING itself is unordered, so sort rather than
+    # ask for sort_by_parameter_order (which SQLite only honours with one INSERT per row).
+    ids = db.scalars(insert(DecisionEvent).returning(DecisionEvent.id), [dict(created_at=now, **row) for row in rows])
+    return sorted(ids)
+
+
+def project_decision_event(
+    db: Session,
+    event: DecisionEvent,
+    app: Application | None = None,
+    *,
+    chat: bool = True,
+) -> Message | None:
+    """
+    Apply a logged decision to its projections: the interaction row and the application
+    (`app` if the caller already has it, else found/created from the event's post).
+
+    A status set by the company (`event.status`) is applied as-is and leaves the
+    decisions alone. With chat=False (rebuilds) only decisions and status are written:
+    no conversations or system messages. Returns the system message to publish, if any.
+    """
+    if event.status is not None:
+        if app is None:
+            app = get_or_create_application(db, event.student_user_id, event.company_user_id, event.post_id)
+        if chat:
+            return update_application_and_conversation(db, app, status=event.status)
+        app.status = event.status
+        return None
+
+    if event.actor_role == UserRole.STUDENT:
+        ensure_student_interaction_row(
+            db, event.student_user_id, event.post_id, decision=event.decision, decided_at=event.created_at,
+        )
+    elif event.student_post_id is not None:
+        ensure_company_studentpost_interaction(
+            db, event.company_user_id, event.student_post_id, decision=event.decision, decided_at=event.created_at,
+        )
+
+    if event.post_id is None:
+        return None
+    if app is None:
+        app = get_or_create_application(db, event.student_user_id, event.company_user_id, event.post_id)
+
+    # Applications keep None for "not decided".
+    decision = event.decision if event.decision != Decision.NONE else None
+    if event.actor_role == UserRole.STUDENT:
+        student_decision, company_decision = decision, app.company_decision
+    else:
+        student_decision, company_decision = app.student_decision, decision
+
+    app.student_decision = student_decision
+    app.company_decision = company_decision
+    if chat:
+        return update_application_and_conversation(db, app)
+    app.status = calculate_application_status(student_decision, company_decision)
+    return None
+
+
+def project_pending_decisions(db: Session) -> int:
+    """
+    Project the events that are not projected yet, in id order; returns how many.
+
+    Each chunk is claimed (projected_at set) in the transaction that projects it, so
+    an event is never applied twice, even by two workers. Feeds are invalidated and
+    system messages published once the chunk is committed.
+    """
+    projected = 0
+    while True:
+        events = (
+            db.query(DecisionEvent)
+            .filter(DecisionEvent.projected_at.is_(None))
+            .order_by(DecisionEvent.id)
+            .limit(PROJECTOR_CHUNK_SIZE)
+            .all()
+        )
+        if not events:
+            return projected
+
+        claimed = (
+            db.query(DecisionEvent)
+            .filter(DecisionEvent.id.in_([event.id for event in events]), DecisionEvent.projected_at.is_(None))
+            .update({"projected_at": datetime.utcnow()}, synchronize_session=False)
+        )
+        if claimed != len(events):
+            # Another projector got some of them first; start over from what is left.
+            db.rollback()
+            continue
+
+        # The company feed hides LIKEd cards of students who have decided on any post,
+        # so a student's first decision changes every company's feed.
+        student_ids = {event.student_user_id for event in events if event.actor_role == UserRole.STUDENT}
+        first_deciders = student_ids - {
+            student_id
+            for (student_id,) in db.query(StudentPostInteraction.student_user_id)
+            .filter(
+                StudentPostInteraction.student_user_id.in_(student_ids),
+                StudentPostInteraction.decision != Decision.NONE,
+            )
+            .distinct()
+        }
+
+        system_msgs, pairs = [], set()
+        for event in events:
+            app = None
+            if event.actor_role == UserRole.COMPANY and event.post_id is None:
+                # Company decisions are linked to a post when projected: the application the
+                # student already has with this company, else the company's latest active post.
+                app = latest_company_student_application(db, event.company_user_id, event.student_user_id)
+                if app is None:
+                    company_post = latest_active_company_post(db, event.company_user_id)
+                    event.post_id = company_post.id if company_post else None
+                else:
+                    event.post_id = app.post_id
+            system_msg = project_decision_event(db, event, app)
+            if system_msg is not None:
+                system_msgs.append(system_msg)
+            pairs.add((event.student_user_id, event.company_user_id))
+
+        # Payloads are built before the commit expires the messages (no reload per message).
+        payloads = [(msg.conversation_id, system_message_response(msg)) for msg in system_msgs]
+        db.commit()
+        for student_id, company_id in pairs:
+            invalidate_match_feeds(student_id, company_id)
+        if first_deciders:
+            invalidate_company_feeds()
+        for conversation_id, payload in payloads:
+            chat_hub.publish(conversation_id, payload)
+        projected += len(events)
+
+
+class DecisionProjector:
+    """
+    Runs `project_pending_decisions` after the decision endpoints have responded
+    (as a background task), one run at a time per process.
+
+    A run requested while another is in progress is not lost: the running one
+    goes round again before it stops.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requested = threading.Event()
+
+    def run(self, bind) -> None:
+        self._requested.set()
+        while self._requested.is_set():
+            if not self._lock.acquire(blocking=False):
+                return
+            try:
+                self._requested.clear()
+                with Session(bind=bind, autoflush=False) as db:
+                    project_pending_decisions(db)
+            finally:
+                self._lock.release()
+
+
+decision_projector = DecisionProjector()
+
+
+def rebuild_decision_projections(db: Session) -> int:
+    """
+    Re-derive decisions and statuses from the log; returns the number of events replayed.
+
+    Only projected events are replayed (pending ones are the projector's). Only what they
+    cover is reset: interaction rows with events, and the student / company side of
+    applications that side has events for (rows from before the log keep their values).
+    Conversations and messages are left alone. The caller commits.
+    """
+    projected = DecisionEvent.projected_at.is_not(None)
+    student_events = select(DecisionEvent.id).where(projected, DecisionEvent.actor_role == UserRole.STUDENT)
+    # Status overrides carry no decision: they do not reset the company's side.
+    company_events = select(DecisionEvent.id).where(
+        projected, DecisionEvent.actor_role == UserRole.COMPANY, DecisionEvent.status.is_(None),
+    )
+
+    db.query(StudentPostInteraction).filter(
+        student_events.where(
+            DecisionEvent.student_user_id == StudentPostInteraction.student_user_id,
+            DecisionEvent.post_id == StudentPostInteraction.post_id,
+        ).exists()
+    ).update({"decision": Decision.NONE, "decided_at": None}, synchronize_session=False)
+    db.query(CompanyStudentPostInteraction).filter(
+        company_events.where(
+            DecisionEvent.company_user_id == CompanyStudentPostInteraction.company_user_id,
+            DecisionEvent.student_post_id == CompanyStudentPostInteraction.student_post_id,
+        ).exists()
+    ).update({"decision": Decision.NONE, "decided_at": None}, synchronize_session=False)
+
+    same_application = (
+        DecisionEvent.student_user_id == Application.student_user_id,
+        DecisionEvent.post_id == Application.post_id,
+    )
+    db.query(Application).filter(student_events.where(*same_application).exists()).update(
+        {"student_decision": None}, synchronize_session=False,
+    )
+    db.query(Application).filter(company_events.where(*same_application).exists()).update(
+        {"company_decision": None}, synchronize_session=False,
+    )
+    db.expire_all()
+
+    replayed, last_id = 0, 0
+    while True:
+        # In id order, a chunk at a time.
+        events = (
+            db.query(DecisionEvent)
+            .filter(projected, DecisionEvent.id > last_id)
+            .order_by(DecisionEvent.id)
+            .limit(REBUILD_CHUNK_SIZE)
+            .all()
         )
-        db.add(row)
+        if not events:
+            break
+        for event in events:
+            project_decision_event(db, event, chat=False)
         db.flush()
-    return row
+        replayed += len(events)
+        last_id = events[-1].id
+    return replayed
 
 
 @router.post("/decisions/student/post")
 def student_decision_post(
     req: StudentDecisionRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current=Depends(get_current_user),
 ):
@@ -212,6 +443,9 @@ def student_decision_post(
     Creates or updates Application with student_decision.
     Status becomes PENDING if LIKE (waiting for company).
     Status becomes DECLINED if PASS.
+
+    The request only appends the decision to the log; the interaction row and the
+    application are updated by the projector right after the response.
     """
     if current.role != UserRole.STUDENT:
         raise HTTPException(status_code=403, detail="Only students can decide on posts")
@@ -220,30 +454,23 @@ def student_decision_post(
     if not post or not post.is_active:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    # Update interaction tracking
-    interaction = ensure_student_interaction_row(db, current.id, post.id)
-    decision = Decision(req.decision)
-    interaction.decision = decision
-    interaction.decided_at = datetime.utcnow()
-    
-    # Get or create application
-    app = get_or_create_application(db, current.id, post.company_user_id, post.id)
-    
-    # Update application with student's decision
-    update_application_and_conversation(
+    append_decision_event(
         db,
-        app,
-        student_decision=decision,
-        company_decision=app.company_decision,
+        actor_role=UserRole.STUDENT,
+        student_user_id=current.id,
+        company_user_id=post.company_user_id,
+        post_id=post.id,
+        decision=Decision(req.decision),
     )
-
     db.commit()
+    background_tasks.add_task(decision_projector.run, db.get_bind())
     return {"ok": True}
 
 
 @router.post("/decisions/company/student-post")
 def company_decision_student_post(
     req: CompanyDecisionStudentPostRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current=Depends(get_current_user),
 ):
@@ -256,7 +483,11 @@ def company_decision_student_post(
     
     If student hasn't acted yet:
     - Creates/updates Application with company_decision = LIKE/PASS
+      (linked to the company's most recent active post)
     - Status becomes PENDING (waiting for student) or DECLINED (if PASS)
+
+    The request only appends the decision to the log; the projector links it to an
+    application and updates the tables right after the response.
     """
     if current.role != UserRole.COMPANY:
         raise HTTPException(status_code=403, detail="Only companies can decide on student posts")
@@ -265,61 +496,23 @@ def company_decision_student_post(
     if not spost or not spost.is_active:
         raise HTTPException(status_code=404, detail="Student post not found")
 
-    # Update interaction tracking
-    interaction = ensure_company_studentpost_interaction(db, current.id, spost.id)
-    decision = Decision(req.decision)
-    interaction.decision = decision
-    interaction.decided_at = datetime.utcnow()
-    
-    # Find if there's an existing application (student liked one of our posts)
-    app = (
-        db.query(Application)
-        .filter(
-            Application.company_user_id == current.id,
-            Application.student_user_id == spost.student_user_id,
-        )
-        .order_by(Application.updated_at.desc())
-        .first()
+    append_decision_event(
+        db,
+        actor_role=UserRole.COMPANY,
+        student_user_id=spost.student_user_id,
+        company_user_id=current.id,
+        student_post_id=spost.id,
+        decision=Decision(req.decision),
     )
-    
-    if app:
-        # Update existing application with company decision
-        update_application_and_conversation(
-            db,
-            app,
-            student_decision=app.student_decision,
-            company_decision=decision,
-        )
-    else:
-        # No existing application - company acted first
-        # Create application with company decision (waiting for student to like a post)
-        # We need a post to link to - use the most recent active post from this company
-        company_post = (
-            db.query(InternshipPost)
-            .filter(
-                InternshipPost.company_user_id == current.id,
-                InternshipPost.is_active == True
-            )
-            .order_by(InternshipPost.created_at.desc())
-            .first()
-        )
-        
-        if company_post:
-            app = get_or_create_application(db, spost.student_user_id, current.id, company_post.id)
-            update_application_and_conversation(
-                db,
-                app,
-                student_decision=app.student_decision,
-                company_decision=decision,
-            )
-
     db.commit()
+    background_tasks.add_task(decision_projector.run, db.get_bind())
     return {"ok": True}
 
 
 @router.post("/decisions/company/student")
 def company_decision_student(
     req: CompanyDecisionStudentRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current=Depends(get_current_user),
 ):
@@ -344,6 +537,102 @@ def company_decision_student(
             studentPostId=spost.id,
             decision=req.decision
         ),
+        background_tasks,
         db,
         current,
     )
+
+
+@router.post("/decisions/batch", response_model=DecisionBatchResponse)
+def decisions_batch(
+    req: DecisionBatchRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current=Depends(get_current_user),
+):
+    """
+    Log a burst of queued swipe decisions in one transaction.
+
+    Students send `postId`, companies `studentPostId`; each item follows the same rules as
+    POST /decisions/student/post and /decisions/company/student-post, in order.
+    An unknown or inactive post fails only its own item.
+
+    Logged items come back as `status: QUEUED` with their `eventId`: the application
+    status is not known yet, the projector applies the decisions right after the response.
+    """
+    if current.role == UserRole.STUDENT:
+        results = _append_student_decisions(db, current.id, req.decisions)
+    elif current.role == UserRole.COMPANY:
+        results = _append_company_decisions(db, current.id, req.decisions)
+    else:
+        raise HTTPException(status_code=403, detail="Only students and companies can decide")
+
+    db.commit()
+    background_tasks.add_task(decision_projector.run, db.get_bind())
+    return DecisionBatchResponse(results=results)
+
+
+def _append_student_decisions(db: Session, student_id: int, items: list[DecisionBatchItem]) -> list[DecisionBatchResult]:
+    post_ids = {item.postId for item in items if item.postId is not None}
+    company_ids = dict(
+        db.query(InternshipPost.id, InternshipPost.company_user_id).filter(
+            InternshipPost.id.in_(post_ids),
+            InternshipPost.is_active == True,
+        )
+    )
+
+    results, rows = [], []
+    for item in items:
+        company_id = company_ids.get(item.postId)
+        if company_id is None:
+            error = "postId is required" if item.postId is None else "Post not found"
+            results.append(DecisionBatchResult(postId=item.postId, ok=False, error=error))
+            continue
+
+        rows.append(dict(
+            actor_role=UserRole.STUDENT,
+            student_user_id=student_id,
+            company_user_id=company_id,
+            post_id=item.postId,
+            decision=Decision(item.decision),
+        ))
+        results.append(DecisionBatchResult(postId=item.postId, ok=True, status="QUEUED"))
+
+    event_ids = iter(append_decision_events(db, rows))
+    for result in results:
+        if result.ok:
+            result.eventId = next(event_ids)
+    return results
+
+
+def _append_company_decisions(db: Session, company_id: int, items: list[DecisionBatchItem]) -> list[DecisionBatchResult]:
+    spost_ids = {item.studentPostId for item in items if item.studentPostId is not None}
+    student_ids = dict(
+        db.query(StudentProfilePost.id, StudentProfilePost.student_user_id).filter(
+            StudentProfilePost.id.in_(spost_ids),
+            StudentProfilePost.is_active == True,
+        )
+    )
+
+    results, rows = [], []
+    for item in items:
+        student_id = student_ids.get(item.studentPostId)
+        if student_id is None:
+            error = "studentPostId is required" if item.studentPostId is None else "Student post not found"
+            results.append(DecisionBatchResult(studentPostId=item.studentPostId, ok=False, error=error))
+            continue
+
+        rows.append(dict(
+            actor_role=UserRole.COMPANY,
+            student_user_id=student_id,
+            company_user_id=company_id,
+            student_post_id=item.studentPostId,
+            decision=Decision(item.decision),
+        ))
+        results.append(DecisionBatchResult(studentPostId=item.studentPostId, ok=True, status="QUEUED"))
+
+    event_ids = iter(append_decision_events(db, rows))
+    for result in results:
+        if result.ok:
+            result.eventId = next(event_ids)
+    return results
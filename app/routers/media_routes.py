@@ -17,6 +17,7 @@ from ..models import (
     StudentProfilePost,
 )
 from ..url_utils import to_public_url
+from ..feed_cache import invalidate_company_feeds
 
 router = APIRouter(prefix="/media", tags=["media"])
 
@@ -78,6 +79,8 @@ def upload_my_profile_image(
             spost.updated_at = datetime.utcnow()
 
     db.commit()
+    if current.role == UserRole.STUDENT:
+        invalidate_company_feeds()
     return {"profileImageUrl": to_public_url(url, request)}
 
 
@@ -125,6 +128,7 @@ def upload_student_profile_post_image(
     post.image_url = url
     post.updated_at = datetime.utcnow()
     db.commit()
+    invalidate_company_feeds()
     return {"imageUrl": to_public_url(url, request)}
 
 
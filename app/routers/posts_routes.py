@@ -5,7 +5,8 @@ from ..deps import get_db, get_current_user
 from ..models import UserRole, InternshipPost, CompanyProfile, User, StudentPostInteraction
 from ..schemas import PostCreateRequest, PostUpdateRequest, PostResponse
 from ..url_utils import to_public_url
-from ..departments import CANONICAL_DEPARTMENTS, normalize_department
+from ..departments import CANONICAL_DEPARTMENTS, department_key, normalize_department
+from ..feed_cache import invalidate_student_feeds
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 
@@ -37,11 +38,13 @@ def create_post(
         description=req.description,
         location=req.location,
         department=department,
+        department_key=department_key(department),
         is_active=True,
     )
     db.add(post)
     db.commit()
     db.refresh(post)
+    invalidate_student_feeds()
 
     company_name = None
     if current.company_profile and current.company_profile.company_name:
@@ -187,6 +190,7 @@ def delete_post(
     # Soft-delete to avoid FK issues with interactions/applications
     post.is_active = False
     db.commit()
+    invalidate_student_feeds()
     return Response(status_code=204)
 
 
@@ -227,9 +231,11 @@ def update_post(
                 },
             )
         post.department = department
+        post.department_key = department_key(department)
 
     db.commit()
     db.refresh(post)
+    invalidate_student_feeds()
 
     company_name = None
     if current.company_profile and current.company_profile.company_name:
@@ -15,6 +15,9 @@ from ..models import (
     CompanyStudentPostInteraction,
 )
 from ..schemas import StudentSaveRequest  # postId + saved
+from ..departments import department_key
+from ..feed_cache import invalidate_company_feeds
+from ..upserts import upsert
 
 from typing import Optional
 from pydantic import BaseModel
@@ -29,36 +32,24 @@ class CompanySaveStudentRequest(BaseModel):
 router = APIRouter(prefix="/saves", tags=["saves"])
 
 
-def ensure_student_post_interaction_row(db: Session, student_user_id: int, post_id: int) -> StudentPostInteraction:
-    row = (
-        db.query(StudentPostInteraction)
-        .filter(
-            StudentPostInteraction.student_user_id == student_user_id,
-            StudentPostInteraction.post_id == post_id,
-        )
-        .first()
+def ensure_student_post_interaction_row(db: Session, student_user_id: int, post_id: int, **changes) -> StudentPostInteraction:
+    return upsert(
+        db,
+        StudentPostInteraction,
+        conflict=("student_user_id", "post_id"),
+        values=dict(student_user_id=student_user_id, post_id=post_id, **changes),
+        update=changes,
     )
-    if not row:
-        row = StudentPostInteraction(student_user_id=student_user_id, post_id=post_id)
-        db.add(row)
-        db.flush()
-    return row
-
-
-def ensure_company_studentpost_interaction_row(db: Session, company_user_id: int, student_post_id: int) -> CompanyStudentPostInteraction:
-    row = (
-        db.query(CompanyStudentPostInteraction)
-        .filter(
-            CompanyStudentPostInteraction.company_user_id == company_user_id,
-            CompanyStudentPostInteraction.student_post_id == student_post_id,
-        )
-        .first()
+
+
+def ensure_company_studentpost_interaction_row(db: Session, company_user_id: int, student_post_id: int, **changes) -> CompanyStudentPostInteraction:
+    return upsert(
+        db,
+        CompanyStudentPostInteraction,
+        conflict=("company_user_id", "student_post_id"),
+        values=dict(company_user_id=company_user_id, student_post_id=student_post_id, **changes),
+        update=changes,
     )
-    if not row:
-        row = CompanyStudentPostInteraction(company_user_id=company_user_id, student_post_id=student_post_id)
-        db.add(row)
-        db.flush()
-    return row
 
 
 def ensure_student_profile_post(db: Session, student: User, sp: StudentProfile | None = None) -> StudentProfilePost:
@@ -99,6 +90,7 @@ def ensure_student_profile_post(db: Session, student: User, sp: StudentProfile |
         title=title,
         description=description,
         location=None,
+        department_key=department_key(sp.department if sp else None),
         is_active=True,
     )
     db.add(spost)
@@ -164,9 +156,11 @@ def set_saved_post_for_student(
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    row = ensure_student_post_interaction_row(db, current.id, post.id)
-    row.saved = req.saved
-    row.saved_at = datetime.utcnow() if req.saved else None
+    ensure_student_post_interaction_row(
+        db, current.id, post.id,
+        saved=req.saved,
+        saved_at=datetime.utcnow() if req.saved else None,
+    )
 
     db.commit()
     return {"ok": True}
@@ -236,6 +230,7 @@ def set_saved_student_for_company(
 
     student = None
     spost = None
+    created_post = False
 
     if req.studentPostId is not None:
         spost = db.get(StudentProfilePost, req.studentPostId)
@@ -246,18 +241,30 @@ def set_saved_student_for_company(
         student = db.get(User, req.studentUserId)
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
-        spost = ensure_student_profile_post(db, student)
+        spost = (
+            db.query(StudentProfilePost)
+            .filter(StudentProfilePost.student_user_id == student.id)
+            .first()
+        )
+        if spost is None:
+            # The new card joins every company's feed.
+            spost = ensure_student_profile_post(db, student)
+            created_post = True
     else:
         raise HTTPException(status_code=400, detail="Provide studentUserId or studentPostId")
 
     if not student or student.role != UserRole.STUDENT:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    row = ensure_company_studentpost_interaction_row(db, current.id, spost.id)
-    row.saved = req.saved
-    row.saved_at = datetime.utcnow() if req.saved else None
+    ensure_company_studentpost_interaction_row(
+        db, current.id, spost.id,
+        saved=req.saved,
+        saved_at=datetime.utcnow() if req.saved else None,
+    )
 
     db.commit()
+    if created_post:
+        invalidate_company_feeds()
     return {"ok": True}
 
 
@@ -160,6 +160,31 @@ class CompanyDecisionStudentPostRequest(BaseModel):
     decision: Literal["LIKE", "PASS"]
 
 
+# Batch of swipe decisions (POST /decisions/batch): students send postId, companies studentPostId
+class DecisionBatchItem(BaseModel):
+    postId: Optional[int] = None
+    studentPostId: Optional[int] = None
+    decision: Literal["LIKE", "PASS"]
+
+
+class DecisionBatchRequest(BaseModel):
+    decisions: List[DecisionBatchItem] = Field(min_length=1, max_length=50)
+
+
+class DecisionBatchResult(BaseModel):
+    postId: Optional[int] = None
+    studentPostId: Optional[int] = None
+    ok: bool
+    # QUEUED: logged, applied right after the response (read the outcome from GET /applications)
+    status: Optional[Literal["QUEUED"]] = None
+    eventId: Optional[int] = None
+    error: Optional[str] = None
+
+
+class DecisionBatchResponse(BaseModel):
+    results: List[DecisionBatchResult]
+
+
 # Convenience: decision by student user id (will resolve to the student's profile post)
 class CompanyDecisionStudentRequest(BaseModel):
     studentUserId: int
@@ -190,6 +215,10 @@ class StudentProfilePostResponse(BaseModel):
         from_attributes = True
 
 
+class OpenConversationResponse(BaseModel):
+    conversationId: int
+
+
 class ApplicationListItem(BaseModel):
     applicationId: int
     status: ApplicationStatus
@@ -281,7 +310,24 @@ class MarkConversationReadRequest(BaseModel):
     readAt: Optional[datetime] = None
 
 
+class MarkConversationReadItem(BaseModel):
+    conversationId: int
+    # None = read up to the latest message
+    lastReadMessageId: Optional[int] = None
+
+
 class MarkConversationReadResponse(BaseModel):
     conversationId: int
     unreadCount: int
     lastReadMessageId: Optional[int] = None
+
+
+class ConversationUnreadCount(BaseModel):
+    conversationId: int
+    unreadCount: int
+
+
+class UnreadSummaryResponse(BaseModel):
+    totalUnread: int
+    # Only conversations with unread messages
+    conversations: list[ConversationUnreadCount] = []
@@ -11,7 +11,9 @@ from .models import (
     CompanyStudentPostInteraction,
 )
 from .auth import hash_password
-from .migrations import ensure_sqlite_columns
+from .migrations import ensure_sqlite_columns, ensure_indexes, ensure_conversation_participants
+from .departments import department_key
+from .messaging import add_message
 
 PENDING_TEXT = "Message still pending"
 ACCEPTED_TEXT = "Ready to connect?"
@@ -125,6 +127,7 @@ def create_post(
         update_fields = {"description": description, "location": location, "is_active": True}
         if department is not None:
             update_fields["department"] = department
+            update_fields["department_key"] = department_key(department)
         _maybe_update(p, **update_fields)
         return p
     p = InternshipPost(
@@ -133,6 +136,7 @@ def create_post(
         description=description,
         location=location,
         department=department,
+        department_key=department_key(department),
         is_active=True,
         created_at=datetime.utcnow()
     )
@@ -141,16 +145,31 @@ def create_post(
     return p
 
 
-def create_student_profile_post(db: Session, student_user_id: int, title: str, description: str, location: str):
+def create_student_profile_post(
+    db: Session,
+    student_user_id: int,
+    title: str,
+    description: str,
+    location: str,
+    department: str | None = None,
+):
     p = db.query(StudentProfilePost).filter(StudentProfilePost.student_user_id == student_user_id).first()
     if p:
-        _maybe_update(p, title=title, description=description, location=location, is_active=True)
+        _maybe_update(
+            p,
+            title=title,
+            description=description,
+            location=location,
+            department_key=department_key(department),
+            is_active=True,
+        )
         return p
     p = StudentProfilePost(
         student_user_id=student_user_id,
         title=title,
         description=description,
         location=location,
+        department_key=department_key(department),
         is_active=True,
         created_at=datetime.utcnow()
     )
@@ -284,13 +303,12 @@ def ensure_application_with_conversation(db: Session, *, post_id: int, student_u
         Message.text == system_text,
     ).first()
     if not existing_system:
-        db.add(Message(
+        add_message(
+            db,
             conversation_id=conv.id,
             type=MessageType.SYSTEM,
-            sender_user_id=None,
-            text=system_text
-        ))
-        db.flush()
+            text=system_text,
+        )
 
     return app, conv
 
@@ -298,6 +316,7 @@ def ensure_application_with_conversation(db: Session, *, post_id: int, student_u
 def main():
     Base.metadata.create_all(bind=engine)
     ensure_sqlite_columns(engine)
+    ensure_indexes(engine)
 
     db = SessionLocal()
     try:
@@ -619,6 +638,7 @@ def main():
                     f"University: {sp.university} ({sp.department})"
                 ),
                 location=spec["location"],
+                department=sp.department,
             )
 
             # Optional: set student profile-post image if present in uploads/student-profile-posts/
@@ -846,24 +866,26 @@ def main():
             Message.sender_user_id == c1.id,
             Message.text == "Καλησπέρα! Μπορείς να μας στείλεις το βιογραφικό σου?",
         ).first():
-            db.add(Message(
+            add_message(
+                db,
                 conversation_id=conv.id,
                 type=MessageType.USER,
                 sender_user_id=c1.id,
                 text="Καλησπέρα! Μπορείς να μας στείλεις το βιογραφικό σου?",
-            ))
+            )
         if not db.query(Message).filter(
             Message.conversation_id == conv.id,
             Message.type == MessageType.USER,
             Message.sender_user_id == s1.id,
             Message.text == "Καλησπέρα σας, σας επισυνάπτω τώρα το βιογραφικό μου.",
         ).first():
-            db.add(Message(
+            add_message(
+                db,
                 conversation_id=conv.id,
                 type=MessageType.USER,
                 sender_user_id=s1.id,
                 text="Καλησπέρα σας, σας επισυνάπτω τώρα το βιογραφικό μου.",
-            ))
+            )
 
         # --- Company interactions demo (company saves + likes student posts) ---
         ensure_company_student_post_interaction(
@@ -963,24 +985,26 @@ def main():
             Message.sender_user_id == companies["medix_talent"].id,
             Message.text == "Hi Kostas! Quick call this week?",
         ).first():
-            db.add(Message(
+            add_message(
+                db,
                 conversation_id=conv2.id,
                 type=MessageType.USER,
                 sender_user_id=companies["medix_talent"].id,
                 text="Hi Kostas! Quick call this week?",
-            ))
+            )
         if not db.query(Message).filter(
             Message.conversation_id == conv2.id,
             Message.type == MessageType.USER,
             Message.sender_user_id == kostas_u.id,
             Message.text == "Yes, available Wed/Thu after 17:00.",
         ).first():
-            db.add(Message(
+            add_message(
+                db,
                 conversation_id=conv2.id,
                 type=MessageType.USER,
                 sender_user_id=kostas_u.id,
                 text="Yes, available Wed/Thu after 17:00.",
-            ))
+            )
 
         # Companies browsing student profile posts
         ensure_company_student_post_interaction(
@@ -1093,6 +1117,8 @@ def main():
         )
 
         db.commit()
+        # The seeded conversations are created without participant rows.
+        ensure_conversation_participants(engine)
         print("Seed completed successfully.")
         print("Demo logins:")
         print("Company: acme_hr / pass1234")
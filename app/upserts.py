@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from typing import Any, TypeVar
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+# Get-or-create as one `INSERT ... ON CONFLICT (...) DO UPDATE ... RETURNING` statement.
+# A SELECT followed by an INSERT costs two round trips, and two concurrent requests can
+# both miss the SELECT and then hit the unique constraint (500). The conflict target must
+# match a unique constraint of the table. Supported on SQLite (3.35+) and PostgreSQL.
+
+T = TypeVar("T")
+
+_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def upsert_statement(dialect_name: str, model: type[T], *, conflict: tuple[str, ...], values: dict[str, Any], update: dict[str, Any] | None = None):
+    try:
+        insert = _INSERTS[dialect_name]
+    except KeyError:
+        raise NotImplementedError(f"upsert is not supported on {dialect_name}") from None
+
+    stmt = insert(model).values(**values)
+    # DO NOTHING returns no row when it conflicts; a no-op update returns the existing one.
+    set_ = update or {conflict[0]: stmt.excluded[conflict[0]]}
+    return stmt.on_conflict_do_update(index_elements=list(conflict), set_=set_).returning(model)
+
+
+def upsert(db: Session, model: type[T], *, conflict: tuple[str, ...], values: dict[str, Any], update: dict[str, Any] | None = None) -> T:
+    """
+    Insert `values`, or apply `update` to the row that already has the same `conflict` columns
+    (leave it as is if `update` is empty). Returns the row, refreshed in the session.
+    """
+    # The returned row overwrites the loaded object: write pending changes first so they are not lost.
+    db.flush()
+    stmt = upsert_statement(db.get_bind().dialect.name, model, conflict=conflict, values=values, update=update)
+    return db.execute(stmt, execution_options={"populate_existing": True}).scalar_one()
@@ -8,6 +8,8 @@ What this does:
 - Normalizes case/whitespace.
 - Maps known synonyms to canonical labels.
 - Optionally reclassifies rows if the text strongly indicates a different canonical department.
+- Rewrites the indexed `department_key` column of internship posts and student profile posts
+  (used by the feed department filters) from the final department values.
 
 Usage:
     C:/Users/eleni/unintend_backend/.venv/Scripts/python.exe scripts/backfill_post_departments.py
@@ -21,7 +23,7 @@ import argparse
 import sqlite3
 from pathlib import Path
 
-from app.departments import CANONICAL_DEPARTMENTS, guess_department, normalize_department
+from app.departments import CANONICAL_DEPARTMENTS, department_key, guess_department, normalize_department
 
 
 def main() -> int:
@@ -92,7 +94,10 @@ def main() -> int:
 
     if updates:
         cur.executemany("UPDATE internship_posts SET department = ? WHERE id = ?", updates)
-        conn.commit()
+
+    key_updates = backfill_department_keys(cur)
+    print(f"department_key updates: {key_updates}")
+    conn.commit()
 
     # Summary
     cur.execute("SELECT department, COUNT(*) c FROM internship_posts GROUP BY department ORDER BY c DESC")
@@ -103,5 +108,35 @@ def main() -> int:
     return 0
 
 
+def backfill_department_keys(cur: sqlite3.Cursor) -> int:
+    """Sync department_key with the department values; returns the number of rows changed."""
+    changed = 0
+
+    cur.execute("SELECT id, department, department_key FROM internship_posts")
+    post_updates = [
+        (department_key(dept), post_id)
+        for post_id, dept, key in cur.fetchall()
+        if department_key(dept) != key
+    ]
+    if post_updates:
+        cur.executemany("UPDATE internship_posts SET department_key = ? WHERE id = ?", post_updates)
+        changed += len(post_updates)
+
+    cur.execute(
+        "SELECT spp.id, sp.department, spp.department_key FROM student_profile_posts spp "
+        "LEFT JOIN student_profiles sp ON sp.user_id = spp.student_user_id"
+    )
+    student_post_updates = [
+        (department_key(dept), post_id)
+        for post_id, dept, key in cur.fetchall()
+        if department_key(dept) != key
+    ]
+    if student_post_updates:
+        cur.executemany("UPDATE student_profile_posts SET department_key = ? WHERE id = ?", student_post_updates)
+        changed += len(student_post_updates)
+
+    return changed
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
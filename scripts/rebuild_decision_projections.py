@@ -0,0 +1,66 @@
+"""Rebuild interaction decisions and application statuses from the decision_events log.
+
+Why this exists:
+- Every LIKE/PASS is appended to `decision_events`; the interaction rows and the
+  application decisions/status are projections of that log, written by the projector
+  right after the request.
+- After a change to the matching rules (or a bad write), the projections can be
+  re-derived from the log instead of fixed with a hand-written migration.
+
+What this does:
+- Resets what the log covers and replays every projected event in order with the current
+  rules (events still pending are left to the projector).
+- Does not create conversations or system messages for statuses that change.
+
+Usage:
+    C:/Users/eleni/unintend_backend/.venv/Scripts/python.exe scripts/rebuild_decision_projections.py
+    C:/Users/eleni/unintend_backend/.venv/Scripts/python.exe scripts/rebuild_decision_projections.py --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models import Application
+from app.routers.interaction_routes import rebuild_decision_projections
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default="unintend.db", help="Path to sqlite DB (default: unintend.db)")
+    parser.add_argument("--dry-run", action="store_true", help="Print changed statuses without writing")
+    args = parser.parse_args()
+
+    db_path = Path(args.db)
+    if not db_path.exists():
+        raise SystemExit(f"DB not found: {db_path.resolve()}")
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    with Session(engine, autoflush=False) as db:
+        before = dict(db.query(Application.id, Application.status).all())
+
+        replayed = rebuild_decision_projections(db)
+        after = dict(db.query(Application.id, Application.status).all())
+        changed = [(app_id, before.get(app_id), status) for app_id, status in after.items() if before.get(app_id) != status]
+
+        print(f"events replayed: {replayed}")
+        print(f"applications with a different status: {len(changed)}")
+        for app_id, old, new in changed[:50]:
+            print(f"application={app_id}: {old.value if old else None} -> {new.value}")
+        if len(changed) > 50:
+            print(f"... ({len(changed) - 50} more)")
+
+        if args.dry_run:
+            db.rollback()
+            return 0
+
+        db.commit()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,67 @@
+"""Recompute ConversationParticipant.unread_count from the messages table.
+
+Why this exists:
+- Unread badges read the stored `unread_count` counter, which is maintained on every
+  message insert / mark-as-read. Writes made outside the API (manual SQL, old code,
+  an interrupted deploy) can leave it out of sync.
+
+What this does:
+- Counts, per participant, the messages after their read pointer that were sent by
+  someone else (SYSTEM messages excluded) and rewrites the counters that differ.
+
+Usage:
+    C:/Users/eleni/unintend_backend/.venv/Scripts/python.exe scripts/reconcile_unread_counts.py
+    C:/Users/eleni/unintend_backend/.venv/Scripts/python.exe scripts/reconcile_unread_counts.py --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+from pathlib import Path
+
+from app.messaging import RECONCILE_UNREAD_COUNTS_SQL
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default="unintend.db", help="Path to sqlite DB (default: unintend.db)")
+    parser.add_argument("--dry-run", action="store_true", help="Print drifted counters without writing")
+    args = parser.parse_args()
+
+    db_path = Path(args.db)
+    if not db_path.exists():
+        raise SystemExit(f"DB not found: {db_path.resolve()}")
+
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+
+    cur.execute("SELECT id, unread_count FROM conversation_participants")
+    before = dict(cur.fetchall())
+
+    # Recompute inside a transaction, then look at what changed.
+    cur.execute(RECONCILE_UNREAD_COUNTS_SQL)
+    cur.execute("SELECT id, conversation_id, user_id, unread_count FROM conversation_participants")
+    drifted = [
+        (part_id, conv_id, user_id, before.get(part_id), count)
+        for part_id, conv_id, user_id, count in cur.fetchall()
+        if before.get(part_id) != count
+    ]
+
+    print(f"total participants: {len(before)}")
+    print(f"drifted counters: {len(drifted)}")
+    for part_id, conv_id, user_id, old, new in drifted[:50]:
+        print(f"conversation={conv_id} user={user_id}: {old} -> {new}")
+    if len(drifted) > 50:
+        print(f"... ({len(drifted) - 50} more)")
+
+    if args.dry_run:
+        conn.rollback()
+        return 0
+
+    conn.commit()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,441 @@
+"""
+Test script για το inbox των applications (GET /applications).
+
+Ελέγχει ότι το inbox χτίζεται με σταθερό αριθμό queries και ότι
+lastMessage / unreadCount / otherPartyName βγαίνουν σωστά.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi import BackgroundTasks, HTTPException, Response
+
+from app.models import (
+    User, UserRole, CompanyProfile, InternshipPost, StudentProfilePost, Conversation,
+    ApplicationStatus, Application, ConversationParticipant, Message, MessageType,
+)
+from app.migrations import ensure_conversation_participants
+from app.pagination import NEXT_CURSOR_HEADER
+from app.routers.application_routes import list_applications
+from app.routers.chat_routes import mark_conversation_read, mark_conversations_read, send_message, unread_summary
+from app.routers.application_routes import set_application_status, open_application_conversation
+from app.routers.interaction_routes import student_decision_post, company_decision_student_post, project_pending_decisions
+from app.schemas import (
+    StudentDecisionRequest, CompanyDecisionStudentPostRequest, SendMessageRequest,
+    MarkConversationReadRequest, MarkConversationReadItem, SetApplicationStatusRequest,
+)
+from app.messaging import LAST_MESSAGE_PREVIEW_LENGTH, RECONCILE_LAST_MESSAGES_SQL, RECONCILE_UNREAD_COUNTS_SQL
+from sqlalchemy import text
+from testkit import make_session, count_queries, make_user
+
+
+def inbox(db, current, response=None, **params):
+    params = {"status": None, "post_id": None, "unread_only": False, "cursor": None, "limit": 50, **params}
+    return list_applications(request=None, response=response or Response(), db=db, current=current, **params)
+
+
+def seed_matches(db, students: int):
+    """One company, `students` students; every student LIKEs the post and the company LIKEs back."""
+    company = make_user(db, "company", UserRole.COMPANY)
+    db.add(CompanyProfile(user_id=company.id, company_name="Acme"))
+    post = InternshipPost(company_user_id=company.id, title="Backend Intern", description="desc")
+    db.add(post)
+    db.flush()
+
+    student_users = []
+    for i in range(students):
+        student = make_user(db, f"student{i}", UserRole.STUDENT)
+        spost = StudentProfilePost(student_user_id=student.id, title="Student", description="desc")
+        db.add(spost)
+        db.commit()
+
+        student_decision_post(
+            StudentDecisionRequest(postId=post.id, decision="LIKE"), BackgroundTasks(), db=db, current=student,
+        )
+        company_decision_student_post(
+            CompanyDecisionStudentPostRequest(studentPostId=spost.id, decision="LIKE"), BackgroundTasks(),
+            db=db, current=company,
+        )
+        project_pending_decisions(db)
+        student_users.append(student)
+
+    return company, post, student_users
+
+
+def conversation_id_for(db, student: User) -> int:
+    return (
+        db.query(Conversation.id)
+        .join(Conversation.application)
+        .filter_by(student_user_id=student.id)
+        .scalar()
+    )
+
+
+def test_inbox_fields():
+    _, db = make_session()
+    try:
+        company, post, (student,) = seed_matches(db, students=1)
+        conv_id = conversation_id_for(db, student)
+
+        send_message(conv_id, request=None, req=SendMessageRequest(text="Hi from Acme"), db=db, current=company)
+        send_message(conv_id, request=None, req=SendMessageRequest(text="Hello!"), db=db, current=company)
+
+        (item,) = inbox(db, student)
+        assert item.status == "ACCEPTED"
+        assert item.conversationId == conv_id
+        assert item.postTitle == "Backend Intern"
+        assert item.otherPartyName == "Acme"
+        assert item.lastMessage == "Hello!"
+        assert item.unreadCount == 2
+        assert item.studentDecision == "LIKE" and item.companyDecision == "LIKE"
+
+        (item,) = inbox(db, company)
+        assert item.otherPartyName == "student0"
+        assert item.lastMessage == "Hello!"
+        assert item.unreadCount == 0  # own messages never count as unread
+    finally:
+        db.close()
+
+
+def test_inbox_query_count_is_constant():
+    counts = []
+    for students in (1, 8):
+        engine, db = make_session()
+        try:
+            company, _, student_users = seed_matches(db, students=students)
+            for student in student_users:
+                conv_id = conversation_id_for(db, student)
+                send_message(conv_id, request=None, req=SendMessageRequest(text="Hi"), db=db, current=student)
+            db.expire_all()
+            company = db.get(User, company.id)
+
+            with count_queries(engine) as statements:
+                items = inbox(db, company)
+            assert len(items) == students
+            assert all(item.unreadCount == 1 for item in items)
+            counts.append(len(statements))
+        finally:
+            db.close()
+
+    assert counts[0] == counts[1], counts
+
+
+def test_inbox_pagination_and_filters():
+    _, db = make_session()
+    try:
+        company, post, student_users = seed_matches(db, students=7)
+        for student in student_users[:2]:
+            conv_id = conversation_id_for(db, student)
+            send_message(conv_id, request=None, req=SendMessageRequest(text="Hi"), db=db, current=student)
+
+        seen = []
+        cursor = None
+        while True:
+            response = Response()
+            page = inbox(db, company, response=response, cursor=cursor, limit=3)
+            assert len(page) <= 3
+            seen.extend(item.applicationId for item in page)
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if cursor is None:
+                break
+        assert len(seen) == len(set(seen)) == 7
+        assert seen == [item.applicationId for item in inbox(db, company)]
+
+        assert len(inbox(db, company, status=ApplicationStatus.ACCEPTED)) == 7
+        assert inbox(db, company, status=ApplicationStatus.PENDING) == []
+        assert len(inbox(db, company, post_id=post.id)) == 7
+        assert inbox(db, company, post_id=post.id + 1) == []
+
+        unread = inbox(db, company, unread_only=True)
+        assert {item.studentUserId for item in unread} == {s.id for s in student_users[:2]}
+    finally:
+        db.close()
+
+
+def test_inbox_is_read_only_after_participant_backfill():
+    engine, db = make_session()
+    try:
+        company = make_user(db, "company", UserRole.COMPANY)
+        student = make_user(db, "student", UserRole.STUDENT)
+        post = InternshipPost(company_user_id=company.id, title="Backend Intern", description="desc")
+        db.add(post)
+        db.flush()
+        # A conversation as the seed script creates it: no participant rows.
+        app = Application(post_id=post.id, student_user_id=student.id, company_user_id=company.id)
+        db.add(app)
+        db.flush()
+        conv = Conversation(application_id=app.id)
+        db.add(conv)
+        db.flush()
+        db.add(Message(conversation_id=conv.id, type=MessageType.SYSTEM, text="Message still pending"))
+        db.commit()
+
+        ensure_conversation_participants(engine)
+        ensure_conversation_participants(engine)  # idempotent
+
+        parts = db.query(ConversationParticipant).filter_by(conversation_id=conv.id).all()
+        assert sorted(p.user_id for p in parts) == sorted([student.id, company.id])
+        last_msg_id = db.query(Message.id).filter_by(conversation_id=conv.id).scalar()
+        assert all(p.last_read_message_id == last_msg_id for p in parts)
+
+        for current in (student, company):
+            with count_queries(engine) as statements:
+                (item,) = inbox(db, current)
+            assert item.unreadCount == 0
+            assert all(stmt.lstrip().upper().startswith("SELECT") for stmt in statements), statements
+    finally:
+        db.close()
+
+
+def test_stored_unread_counts_match_a_recount():
+    engine, db = make_session()
+    try:
+        company, _, (student,) = seed_matches(db, students=1)
+        conv_id = conversation_id_for(db, student)
+
+        def stored():
+            rows = db.query(ConversationParticipant.user_id, ConversationParticipant.unread_count).filter_by(
+                conversation_id=conv_id,
+            )
+            return dict(rows.all())
+
+        def recounted():
+            db.execute(text(RECONCILE_UNREAD_COUNTS_SQL))
+            counts = stored()
+            db.rollback()
+            return counts
+
+        ids = [
+            send_message(conv_id, request=None, req=SendMessageRequest(text=f"c{i}"), db=db, current=company).id
+            for i in range(3)
+        ]
+        assert stored() == {student.id: 3, company.id: 0} == recounted()
+
+        # Replying reads everything before the reply.
+        send_message(conv_id, request=None, req=SendMessageRequest(text="s"), db=db, current=student)
+        assert stored() == {student.id: 0, company.id: 1} == recounted()
+
+        # Partial read, then read everything.
+        for i in range(2):
+            send_message(conv_id, request=None, req=SendMessageRequest(text=f"s{i}"), db=db, current=student)
+        assert stored()[company.id] == 3
+        marked = mark_conversation_read(
+            conv_id, MarkConversationReadRequest(lastReadMessageId=ids[-1] + 1), db=db, current=company,
+        )
+        assert marked.unreadCount == 2 and stored() == recounted()
+        marked = mark_conversation_read(conv_id, MarkConversationReadRequest(), db=db, current=company)
+        assert marked.unreadCount == 0 and stored() == {student.id: 0, company.id: 0}
+
+        # SYSTEM messages never count.
+        send_message(conv_id, request=None, req=SendMessageRequest(text="bye"), db=db, current=company)
+        app_id = db.query(Conversation.application_id).filter_by(id=conv_id).scalar()
+        set_application_status(
+            app_id, SetApplicationStatusRequest(status="DECLINED"), BackgroundTasks(), db=db, current=company,
+        )
+        project_pending_decisions(db)
+        assert stored() == {student.id: 1, company.id: 0} == recounted()
+
+        (item,) = inbox(db, student)
+        assert item.unreadCount == 1
+    finally:
+        db.close()
+
+
+def test_unread_summary():
+    engine, db = make_session()
+    try:
+        company, _, student_users = seed_matches(db, students=3)
+        for n, student in enumerate(student_users):
+            conv_id = conversation_id_for(db, student)
+            for i in range(n):
+                send_message(conv_id, request=None, req=SendMessageRequest(text=f"m{i}"), db=db, current=student)
+
+        db.refresh(company)  # as loaded by get_current_user
+        with count_queries(engine) as statements:
+            summary = unread_summary(db=db, current=company)
+        assert len(statements) == 1
+        assert summary.totalUnread == 0 + 1 + 2
+        assert [(c.conversationId, c.unreadCount) for c in summary.conversations] == [
+            (conversation_id_for(db, student_users[1]), 1),
+            (conversation_id_for(db, student_users[2]), 2),
+        ]
+        assert sum(item.unreadCount for item in inbox(db, company)) == summary.totalUnread
+
+        summary = unread_summary(db=db, current=student_users[2])
+        assert summary.totalUnread == 0 and summary.conversations == []
+    finally:
+        db.close()
+
+
+def test_mark_many_conversations_read():
+    engine, db = make_session()
+    try:
+        company, _, student_users = seed_matches(db, students=4)
+        conv_ids = [conversation_id_for(db, student) for student in student_users]
+        sent = {}
+        for conv_id, student in zip(conv_ids, student_users):
+            sent[conv_id] = [
+                send_message(conv_id, request=None, req=SendMessageRequest(text=f"m{i}"), db=db, current=student).id
+                for i in range(3)
+            ]
+        outsider_conv = conv_ids.pop()
+
+        # Latest message in the first two, a partial read in the third.
+        items = [
+            MarkConversationReadItem(conversationId=conv_ids[0]),
+            MarkConversationReadItem(conversationId=conv_ids[1]),
+            MarkConversationReadItem(conversationId=conv_ids[2], lastReadMessageId=sent[conv_ids[2]][0]),
+        ]
+        db.refresh(company)  # as loaded by get_current_user
+        with count_queries(engine) as statements:
+            results = mark_conversations_read(items, db=db, current=company)
+        # Independent of the batch size: participants + message owners, the pointer UPDATEs
+        # (one executemany per column set), then recount UPDATE + SELECT for the partial reads.
+        assert len(statements) == 6, statements
+        assert [(r.conversationId, r.unreadCount, r.lastReadMessageId) for r in results] == [
+            (conv_ids[0], 0, sent[conv_ids[0]][-1]),
+            (conv_ids[1], 0, sent[conv_ids[1]][-1]),
+            (conv_ids[2], 2, sent[conv_ids[2]][0]),
+        ]
+        summary = unread_summary(db=db, current=company)
+        assert summary.totalUnread == 2 + 3
+
+        # Same answer as the one-by-one endpoint.
+        single = mark_conversation_read(
+            conv_ids[2], MarkConversationReadRequest(lastReadMessageId=sent[conv_ids[2]][0]), db=db, current=company,
+        )
+        assert single == results[2]
+
+        # One bad item rejects the whole batch.
+        student = student_users[0]
+        for items, code in (
+            ([MarkConversationReadItem(conversationId=conv_ids[0]), MarkConversationReadItem(conversationId=outsider_conv)], 403),
+            ([MarkConversationReadItem(conversationId=conv_ids[0], lastReadMessageId=sent[conv_ids[1]][0])], 400),
+            ([MarkConversationReadItem(conversationId=conv_ids[0])] * 2, 400),
+        ):
+            before = unread_summary(db=db, current=student)
+            try:
+                mark_conversations_read(items, db=db, current=student)
+            except HTTPException as exc:
+                assert exc.status_code == code
+            else:
+                raise AssertionError(f"{items} should have been rejected")
+            db.rollback()
+            assert unread_summary(db=db, current=student) == before
+    finally:
+        db.close()
+
+
+def test_conversations_are_opened_lazily():
+    engine, db = make_session()
+    try:
+        company = make_user(db, "company", UserRole.COMPANY)
+        student = make_user(db, "student", UserRole.STUDENT)
+        post = InternshipPost(company_user_id=company.id, title="Backend Intern", description="desc")
+        db.add(post)
+        db.commit()
+
+        # A like only appends to the log; projecting it writes the interaction and the
+        # application, and no chat rows.
+        with count_queries(engine) as statements:
+            student_decision_post(
+                StudentDecisionRequest(postId=post.id, decision="LIKE"), BackgroundTasks(), db=db, current=student,
+            )
+        writes = [s for s in statements if s.startswith(("INSERT", "UPDATE"))]
+        assert len(writes) == 1 and writes[0].startswith("INSERT INTO decision_events"), writes
+        with count_queries(engine) as statements:
+            project_pending_decisions(db)
+        writes = [s for s in statements if s.startswith(("INSERT", "UPDATE"))]
+        # claim of the event, interaction upsert, application upsert, its decision/status
+        assert len(writes) == 4, writes
+        assert db.query(Conversation).count() == db.query(Message).count() == 0
+
+        (item,) = inbox(db, student)
+        assert item.conversationId is None and item.status == ApplicationStatus.PENDING
+        assert item.lastMessage == "Message still pending" and item.unreadCount == 0
+
+        # Opening the chat creates the conversation once.
+        opened = open_application_conversation(item.applicationId, db=db, current=company)
+        assert open_application_conversation(item.applicationId, db=db, current=student) == opened
+        assert db.query(ConversationParticipant).filter_by(conversation_id=opened.conversationId).count() == 2
+        (item,) = inbox(db, student)
+        assert item.conversationId == opened.conversationId and item.lastMessage == "Message still pending"
+
+        outsider = make_user(db, "outsider", UserRole.STUDENT)
+        try:
+            open_application_conversation(item.applicationId, db=db, current=outsider)
+        except HTTPException as exc:
+            assert exc.status_code == 403
+        else:
+            raise AssertionError("outsiders cannot open the chat")
+
+        # A status change without a conversation: ACCEPTED opens one, DECLINED does not.
+        other_post = InternshipPost(company_user_id=company.id, title="Frontend Intern", description="desc")
+        db.add(other_post)
+        db.commit()
+        student_decision_post(
+            StudentDecisionRequest(postId=other_post.id, decision="LIKE"), BackgroundTasks(), db=db, current=student,
+        )
+        project_pending_decisions(db)
+        app_id = db.query(Application.id).filter_by(post_id=other_post.id).scalar()
+        set_application_status(
+            app_id, SetApplicationStatusRequest(status="DECLINED"), BackgroundTasks(), db=db, current=company,
+        )
+        project_pending_decisions(db)
+        assert db.query(Conversation).filter_by(application_id=app_id).count() == 0
+        set_application_status(
+            app_id, SetApplicationStatusRequest(status="ACCEPTED"), BackgroundTasks(), db=db, current=company,
+        )
+        project_pending_decisions(db)
+        conv = db.query(Conversation).filter_by(application_id=app_id).one()
+        assert [m.text for m in db.query(Message).filter_by(conversation_id=conv.id)] == ["Ready to connect?"]
+    finally:
+        db.close()
+
+
+def test_inbox_reads_stored_last_message():
+    engine, db = make_session()
+    try:
+        company, _, (student,) = seed_matches(db, students=1)
+        conv_id = conversation_id_for(db, student)
+
+        (item,) = inbox(db, student)
+        assert item.lastMessage == "Ready to connect?"  # the system message of the match
+
+        long_text = "x" * (LAST_MESSAGE_PREVIEW_LENGTH + 50)
+        sent = send_message(conv_id, request=None, req=SendMessageRequest(text=long_text), db=db, current=company)
+
+        with count_queries(engine) as statements:
+            (item,) = inbox(db, student)
+        assert not any("FROM messages" in stmt or "JOIN messages" in stmt for stmt in statements), statements
+        assert item.lastMessageId == sent.id
+        assert item.lastMessageAt == sent.createdAt
+        assert item.lastMessage == long_text[:LAST_MESSAGE_PREVIEW_LENGTH]
+
+        # The reconcile statement (used by the startup backfill) agrees with the stored values.
+        stored = db.query(
+            Conversation.last_message_id, Conversation.last_message_at, Conversation.last_message_preview,
+        ).filter_by(id=conv_id).one()
+        db.execute(text(RECONCILE_LAST_MESSAGES_SQL))
+        recomputed = db.query(
+            Conversation.last_message_id, Conversation.last_message_at, Conversation.last_message_preview,
+        ).filter_by(id=conv_id).one()
+        db.rollback()
+        assert tuple(stored) == tuple(recomputed)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    test_inbox_fields()
+    test_inbox_query_count_is_constant()
+    test_inbox_pagination_and_filters()
+    test_inbox_is_read_only_after_participant_backfill()
+    test_stored_unread_counts_match_a_recount()
+    test_unread_summary()
+    test_mark_many_conversations_read()
+    test_conversations_are_opened_lazily()
+    test_inbox_reads_stored_last_message()
+    print("[OK] Applications inbox")
@@ -0,0 +1,244 @@
+"""
+Test script για το chat history (GET /conversations/{id}/messages).
+
+Ελέγχει το paging με before_id / after_id / limit, ότι
+το query διαβάζει ένα μικρό range από το (conversation_id, id) index και ότι
+το serialization των senders κάνει σταθερό αριθμό queries.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import event
+
+from app.models import (
+    User, UserRole, CompanyProfile, InternshipPost, Application, Conversation, Message, MessageType,
+    ConversationParticipant,
+)
+from app.migrations import ensure_conversation_participants
+from app.routers.chat_routes import can_access_conversation, get_messages, send_message
+from app.schemas import SendMessageRequest
+from testkit import make_session, make_user
+
+
+def seed_chat(engine, db, messages: int):
+    """An accepted application whose conversation has `messages` user messages, alternating senders."""
+    company = make_user(db, "company", UserRole.COMPANY)
+    db.add(CompanyProfile(user_id=company.id, company_name="Acme"))
+    student = make_user(db, "student", UserRole.STUDENT)
+    post = InternshipPost(company_user_id=company.id, title="Backend Intern", description="desc")
+    db.add(post)
+    db.flush()
+    app = Application(post_id=post.id, student_user_id=student.id, company_user_id=company.id)
+    db.add(app)
+    db.flush()
+    conv = Conversation(application_id=app.id)
+    db.add(conv)
+    db.flush()
+    db.add(Message(conversation_id=conv.id, type=MessageType.SYSTEM, text="Ready to connect?"))
+    db.commit()
+    ensure_conversation_participants(engine)
+
+    for i in range(messages):
+        sender = student if i % 2 == 0 else company
+        send_message(conv.id, request=None, req=SendMessageRequest(text=f"msg {i}"), db=db, current=sender)
+    return student, company, conv.id
+
+
+def history(db, conv_id, current, before_id=None, after_id=None, limit=50):
+    return get_messages(
+        conv_id, request=None, before_id=before_id, after_id=after_id, limit=limit,
+        db=db, current=current,
+    )
+
+
+def test_history_paging():
+    engine, db = make_session()
+    try:
+        student, _, conv_id = seed_chat(engine, db, messages=12)
+        all_ids = [m.id for m in history(db, conv_id, student)]
+        assert len(all_ids) == 13
+        assert all_ids == sorted(all_ids)
+
+        # Latest page, oldest first.
+        latest = history(db, conv_id, student, limit=5)
+        assert [m.id for m in latest] == all_ids[-5:]
+        assert latest[-1].text == "msg 11"
+
+        # Scroll up until the start of the chat.
+        seen = [m.id for m in latest]
+        while True:
+            page = history(db, conv_id, student, before_id=seen[0], limit=5)
+            if not page:
+                break
+            seen = [m.id for m in page] + seen
+        assert seen == all_ids
+
+        # Catch up after a known message.
+        page = history(db, conv_id, student, after_id=all_ids[3], limit=4)
+        assert [m.id for m in page] == all_ids[4:8]
+        assert history(db, conv_id, student, after_id=all_ids[-1]) == []
+
+        # Both bounds: the messages strictly in between.
+        page = history(db, conv_id, student, after_id=all_ids[2], before_id=all_ids[6])
+        assert [m.id for m in page] == all_ids[3:6]
+    finally:
+        db.close()
+
+
+def test_history_reads_an_index_range():
+    engine, db = make_session()
+    try:
+        student, _, conv_id = seed_chat(engine, db, messages=3)
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if "FROM messages" in statement:
+                statements.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            for params in ({}, {"before_id": 3}, {"after_id": 2}):
+                history(db, conv_id, student, **params)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+        assert statements
+        with engine.connect() as conn:
+            for statement, parameters in statements:
+                plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+                assert not any(line.startswith("SCAN messages") for line in plan), plan
+                assert not any("TEMP B-TREE" in line for line in plan), plan
+                assert any(line.startswith("SEARCH messages USING INDEX") for line in plan), plan
+    finally:
+        db.close()
+
+
+def test_sender_identity_is_resolved_once_per_request():
+    counts = []
+    for messages in (2, 30):
+        engine, db = make_session()
+        try:
+            student, company, conv_id = seed_chat(engine, db, messages=messages)
+            db.expire_all()
+            student = db.get(User, student.id)
+
+            statements = []
+
+            def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            event.listen(engine, "before_cursor_execute", before_cursor_execute)
+            try:
+                msgs = history(db, conv_id, student)
+            finally:
+                event.remove(engine, "before_cursor_execute", before_cursor_execute)
+            counts.append(len(statements))
+
+            system, first, second = msgs[0], msgs[1], msgs[2]
+            assert system.isSystem and system.sender is None and system.senderRole is None
+            assert first.sender.id == student.id and first.sender.role == UserRole.STUDENT
+            assert first.senderName == "student" and first.isMine is True
+            assert second.sender.name == "Acme" and second.fromCompany and second.isMine is False
+        finally:
+            db.close()
+
+    assert counts[0] == counts[1], counts
+
+
+def test_send_message_statement_budget():
+    engine, db = make_session()
+    try:
+        student, company, conv_id = seed_chat(engine, db, messages=0)
+        db.refresh(company)  # as loaded by get_current_user
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(" ".join(statement.split()))
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            sent = send_message(conv_id, request=None, req=SendMessageRequest(text="Hello!"), db=db, current=company)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+        # One read, the insert, the conversation pointer and one UPDATE for both participants.
+        assert len(statements) == 4, statements
+        assert statements[0].startswith("SELECT"), statements
+        assert statements[1].startswith("INSERT INTO messages"), statements
+        assert statements[2].startswith("UPDATE conversations"), statements
+        assert statements[3].startswith("UPDATE conversation_participants"), statements
+
+        assert sent.text == "Hello!" and sent.isMine is True
+        assert sent.sender.role == UserRole.COMPANY and sent.sender.name == "Acme"
+
+        parts = dict(
+            db.query(ConversationParticipant.user_id, ConversationParticipant.last_read_message_id)
+            .filter_by(conversation_id=conv_id)
+            .all()
+        )
+        assert parts[company.id] == sent.id
+        assert parts[student.id] < sent.id
+        conv = db.get(Conversation, conv_id)
+        assert conv.last_message_id == sent.id and conv.last_message_preview == "Hello!"
+    finally:
+        db.close()
+
+
+def test_access_check_is_one_indexed_lookup_then_cached():
+    engine, db = make_session()
+    try:
+        student, company, conv_id = seed_chat(engine, db, messages=0)
+        outsider = make_user(db, "outsider", UserRole.STUDENT)
+        db.commit()
+        student_id, company_id, outsider_id = student.id, company.id, outsider.id
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            assert can_access_conversation(db, conv_id, student_id)
+            first = list(statements)
+            assert can_access_conversation(db, conv_id, student_id)
+            assert len(statements) == len(first) == 1  # cached after the first hit
+
+            statements.clear()
+            assert not can_access_conversation(db, conv_id, outsider_id)
+            assert not can_access_conversation(db, conv_id, outsider_id)
+            assert len(statements) == 2  # denials are never cached
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+        with engine.connect() as conn:
+            statement, parameters = first[0]
+            plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+        assert any(
+            line.startswith("SEARCH conversation_participants USING COVERING INDEX")
+            and "conversation_id=? AND user_id=?" in line
+            for line in plan
+        ), plan
+
+        # Removing the participant row revokes access.
+        part = db.query(ConversationParticipant).filter_by(conversation_id=conv_id, user_id=student_id).one()
+        db.delete(part)
+        db.commit()
+        assert not can_access_conversation(db, conv_id, student_id)
+        assert can_access_conversation(db, conv_id, company_id)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    test_history_paging()
+    test_history_reads_an_index_range()
+    test_sender_identity_is_resolved_once_per_request()
+    test_send_message_statement_budget()
+    test_access_check_is_one_indexed_lookup_then_cached()
+    print("[OK] Chat history paging")
@@ -0,0 +1,202 @@
+"""
+Test script για το real-time chat (WebSocket /conversations/{id}/ws και long-poll .../messages/poll).
+
+Ελέγχει ότι ένα μήνυμα που στέλνεται με POST .../messages φτάνει
+σε όσους είναι συνδεδεμένοι στο socket της συνομιλίας, ότι
+το socket κάνει τον ίδιο έλεγχο JWT / πρόσβασης με τα REST endpoints, και ότι
+το long-poll ξυπνάει με νέα μηνύματα (και system messages).
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi import FastAPI, WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from app.auth import create_access_token
+from app.chat_hub import chat_hub
+from app.deps import get_db
+from app.models import User, UserRole, CompanyProfile, InternshipPost, Application, Conversation, Message, MessageType
+from app.migrations import ensure_conversation_participants
+from app.routers import application_routes, chat_routes
+from testkit import make_sessionmaker
+
+
+def make_client():
+    engine, Session = make_sessionmaker()
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(chat_routes.router)
+    app.include_router(application_routes.router)
+    app.dependency_overrides[get_db] = override_get_db
+    return engine, Session, TestClient(app)
+
+
+def seed_chat(engine, db):
+    company = User(username="company", email="company@example.com", password_hash="x", role=UserRole.COMPANY)
+    student = User(username="student", email="student@example.com", password_hash="x", role=UserRole.STUDENT)
+    outsider = User(username="outsider", email="outsider@example.com", password_hash="x", role=UserRole.STUDENT)
+    db.add_all([company, student, outsider])
+    db.flush()
+    db.add(CompanyProfile(user_id=company.id, company_name="Acme"))
+    post = InternshipPost(company_user_id=company.id, title="Backend Intern", description="desc")
+    db.add(post)
+    db.flush()
+    app = Application(post_id=post.id, student_user_id=student.id, company_user_id=company.id)
+    db.add(app)
+    db.flush()
+    conv = Conversation(application_id=app.id)
+    db.add(conv)
+    db.flush()
+    db.add(Message(conversation_id=conv.id, type=MessageType.SYSTEM, text="Ready to connect?"))
+    db.commit()
+    ensure_conversation_participants(engine)
+    return company.id, student.id, outsider.id, conv.id
+
+
+def last_message_id(Session, conv_id: int) -> int:
+    with Session() as db:
+        return db.query(Message.id).filter_by(conversation_id=conv_id).order_by(Message.id.desc()).limit(1).scalar()
+
+
+def poll_in_background(client, url, headers):
+    """Start a long-poll request on a thread; returns (thread, result dict)."""
+    result = {}
+
+    def run():
+        result["response"] = client.get(url, headers=headers)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, result
+
+
+def wait_for_subscriber(conv_id: int):
+    deadline = time.monotonic() + 5
+    while chat_hub.subscriber_count(conv_id) == 0:
+        assert time.monotonic() < deadline, "long-poll never started waiting"
+        time.sleep(0.01)
+
+
+def auth(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(user_id)}"}
+
+
+def test_websocket_pushes_sent_messages():
+    engine, Session, client = make_client()
+    with Session() as db:
+        company_id, student_id, _, conv_id = seed_chat(engine, db)
+
+    student_token = create_access_token(student_id)
+    with client.websocket_connect(f"/conversations/{conv_id}/ws?token={student_token}") as student_ws, \
+            client.websocket_connect(f"/conversations/{conv_id}/ws", headers=auth(company_id)) as company_ws:
+        r = client.post(f"/conversations/{conv_id}/messages", json={"text": "Hello!"}, headers=auth(company_id))
+        assert r.status_code == 200, r.text
+
+        pushed_to_student = student_ws.receive_json()
+        pushed_to_company = company_ws.receive_json()
+
+        assert pushed_to_student["id"] == r.json()["id"]
+        assert pushed_to_student["text"] == "Hello!"
+        assert pushed_to_student["senderId"] == company_id
+        assert pushed_to_student["sender"]["name"] == "Acme"
+        # isMine is computed for each listener.
+        assert pushed_to_student["isMine"] is False
+        assert pushed_to_company["isMine"] is True
+
+    assert chat_hub.subscriber_count(conv_id) == 0
+
+
+def test_websocket_rejects_bad_token_and_outsiders():
+    engine, Session, client = make_client()
+    with Session() as db:
+        _, _, outsider_id, conv_id = seed_chat(engine, db)
+
+    for url, headers in (
+        (f"/conversations/{conv_id}/ws", {}),
+        (f"/conversations/{conv_id}/ws?token=garbage", {}),
+        (f"/conversations/{conv_id}/ws", auth(outsider_id)),
+    ):
+        try:
+            with client.websocket_connect(url, headers=headers):
+                pass
+        except WebSocketDisconnect as exc:
+            assert exc.code == 1008
+        else:
+            raise AssertionError(f"{url} should have been rejected")
+
+
+def test_long_poll_returns_pending_messages_and_times_out():
+    engine, Session, client = make_client()
+    with Session() as db:
+        company_id, student_id, outsider_id, conv_id = seed_chat(engine, db)
+    system_id = last_message_id(Session, conv_id)
+
+    # Something newer already exists: no waiting.
+    r = client.get(f"/conversations/{conv_id}/messages/poll?after_id=0&timeout=30", headers=auth(student_id))
+    assert r.status_code == 200
+    assert [m["id"] for m in r.json()] == [system_id]
+
+    # Nothing new: empty list after the timeout.
+    started = time.monotonic()
+    r = client.get(f"/conversations/{conv_id}/messages/poll?after_id={system_id}&timeout=0.2", headers=auth(student_id))
+    assert r.status_code == 200 and r.json() == []
+    assert time.monotonic() - started >= 0.2
+    assert chat_hub.subscriber_count(conv_id) == 0
+
+    r = client.get(f"/conversations/{conv_id}/messages/poll?after_id=0&timeout=0", headers=auth(outsider_id))
+    assert r.status_code == 403
+
+
+def test_long_poll_is_woken_by_new_messages():
+    engine, Session, client = make_client()
+    with Session() as db:
+        company_id, student_id, _, conv_id = seed_chat(engine, db)
+    after_id = last_message_id(Session, conv_id)
+
+    # A user message.
+    thread, result = poll_in_background(
+        client, f"/conversations/{conv_id}/messages/poll?after_id={after_id}&timeout=10", auth(student_id),
+    )
+    wait_for_subscriber(conv_id)
+    r = client.post(f"/conversations/{conv_id}/messages", json={"text": "Hello!"}, headers=auth(company_id))
+    assert r.status_code == 200
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    polled = result["response"].json()
+    assert [m["id"] for m in polled] == [r.json()["id"]]
+    assert polled[0]["isMine"] is False
+
+    # A system message from a status change.
+    after_id = r.json()["id"]
+    thread, result = poll_in_background(
+        client, f"/conversations/{conv_id}/messages/poll?after_id={after_id}&timeout=10", auth(student_id),
+    )
+    wait_for_subscriber(conv_id)
+    with Session() as db:
+        app_id = db.query(Conversation.application_id).filter_by(id=conv_id).scalar()
+    r = client.post(f"/applications/{app_id}/status", json={"status": "DECLINED"}, headers=auth(company_id))
+    assert r.status_code == 200
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    polled = result["response"].json()
+    assert len(polled) == 1 and polled[0]["isSystem"] is True
+
+
+if __name__ == "__main__":
+    test_websocket_pushes_sent_messages()
+    test_websocket_rejects_bad_token_and_outsiders()
+    test_long_poll_returns_pending_messages_and_times_out()
+    test_long_poll_is_woken_by_new_messages()
+    print("[OK] Real-time chat")
@@ -0,0 +1,280 @@
+"""
+Test script για το log των αποφάσεων (decision_events) και το rebuild των projections.
+
+Ελέγχει ότι τα endpoints κάνουν μόνο το append στο log, ότι ο projector
+ενημερώνει τα interaction rows και τα applications, και ότι το rebuild από το log
+ξαναβγάζει τα ίδια interaction rows και application statuses χωρίς να
+αγγίζει τα μηνύματα.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import asyncio
+
+from fastapi import BackgroundTasks
+
+from app.models import (
+    UserRole, InternshipPost, StudentProfilePost, Application, ApplicationStatus, Decision,
+    DecisionEvent, Message, StudentPostInteraction, CompanyStudentPostInteraction,
+)
+from app.routers.application_routes import set_application_status
+from app.routers.interaction_routes import (
+    company_decision_student_post, decisions_batch, project_pending_decisions, rebuild_decision_projections,
+    student_decision_post,
+)
+from app.schemas import (
+    CompanyDecisionStudentPostRequest, DecisionBatchItem, DecisionBatchRequest, SetApplicationStatusRequest,
+    StudentDecisionRequest,
+)
+from testkit import make_session, count_queries, make_user
+
+
+def projections(db):
+    return {
+        "student": sorted((r.student_user_id, r.post_id, r.decision) for r in db.query(StudentPostInteraction)),
+        "company": sorted((r.company_user_id, r.student_post_id, r.decision) for r in db.query(CompanyStudentPostInteraction)),
+        "applications": sorted(
+            (a.id, a.student_decision, a.company_decision, a.status) for a in db.query(Application)
+        ),
+    }
+
+
+def seed_decisions(db):
+    company = make_user(db, "company", UserRole.COMPANY)
+    students = [make_user(db, f"student{i}", UserRole.STUDENT) for i in range(3)]
+    posts = [InternshipPost(company_user_id=company.id, title=f"Post {i}", description="desc") for i in range(2)]
+    sposts = [StudentProfilePost(student_user_id=s.id, title="Student", description="desc") for s in students]
+    db.add_all(posts + sposts)
+    db.commit()
+
+    for student, post in zip(students, posts):
+        student_decision_post(
+            StudentDecisionRequest(postId=post.id, decision="LIKE"), BackgroundTasks(), db=db, current=student,
+        )
+    decisions_batch(DecisionBatchRequest(decisions=[
+        DecisionBatchItem(studentPostId=sposts[0].id, decision="LIKE"),  # match
+        DecisionBatchItem(studentPostId=sposts[1].id, decision="PASS"),
+        DecisionBatchItem(studentPostId=sposts[2].id, decision="LIKE"),  # company first
+    ]), BackgroundTasks(), db=db, current=company)
+    # Changed their mind.
+    company_decision_student_post(
+        CompanyDecisionStudentPostRequest(studentPostId=sposts[1].id, decision="LIKE"), BackgroundTasks(),
+        db=db, current=company,
+    )
+    project_pending_decisions(db)
+    return company, students, posts, sposts
+
+
+def test_every_decision_is_logged():
+    engine, db = make_session()
+    try:
+        company, students, posts, sposts = seed_decisions(db)
+        events = [
+            (e.actor_role, e.student_user_id, e.post_id, e.student_post_id, e.decision)
+            for e in db.query(DecisionEvent).order_by(DecisionEvent.id)
+        ]
+        assert events == [
+            (UserRole.STUDENT, students[0].id, posts[0].id, None, Decision.LIKE),
+            (UserRole.STUDENT, students[1].id, posts[1].id, None, Decision.LIKE),
+            # Linked to a post by the projector.
+            (UserRole.COMPANY, students[0].id, posts[0].id, sposts[0].id, Decision.LIKE),
+            (UserRole.COMPANY, students[1].id, posts[1].id, sposts[1].id, Decision.PASS),
+            # No application yet: linked to the company's most recent active post.
+            (UserRole.COMPANY, students[2].id, posts[1].id, sposts[2].id, Decision.LIKE),
+            (UserRole.COMPANY, students[1].id, posts[1].id, sposts[1].id, Decision.LIKE),
+        ]
+        assert db.query(DecisionEvent).filter(DecisionEvent.projected_at.is_(None)).count() == 0
+    finally:
+        db.close()
+
+
+def test_swipes_only_append_to_the_log():
+    engine, db = make_session()
+    try:
+        company = make_user(db, "company", UserRole.COMPANY)
+        student = make_user(db, "student", UserRole.STUDENT)
+        post = InternshipPost(company_user_id=company.id, title="Post", description="desc")
+        spost = StudentProfilePost(student_user_id=student.id, title="Student", description="desc")
+        db.add_all([post, spost])
+        db.commit()
+        tasks = BackgroundTasks()
+
+        db.refresh(student)  # as loaded by get_current_user
+        with count_queries(engine) as statements:
+            student_decision_post(StudentDecisionRequest(postId=post.id, decision="LIKE"), tasks, db=db, current=student)
+        # A swipe looks its target up and appends the event, nothing more.
+        assert [s.split()[0] for s in statements] == ["SELECT", "INSERT"], statements
+
+        db.refresh(company)
+        with count_queries(engine) as statements:
+            company_decision_student_post(
+                CompanyDecisionStudentPostRequest(studentPostId=spost.id, decision="LIKE"), tasks,
+                db=db, current=company,
+            )
+        assert [s.split()[0] for s in statements] == ["SELECT", "INSERT"], statements
+        assert db.query(Application).count() == db.query(StudentPostInteraction).count() == 0
+
+        # The projector runs after the response and makes the match.
+        asyncio.run(tasks())
+        db.expire_all()
+        app = db.query(Application).one()
+        assert (app.student_decision, app.company_decision, app.status) == (
+            Decision.LIKE, Decision.LIKE, ApplicationStatus.ACCEPTED,
+        )
+        assert [m.text for m in db.query(Message)] == ["Ready to connect?"]
+        assert project_pending_decisions(db) == 0
+    finally:
+        db.close()
+
+
+def test_rebuild_restores_the_projections():
+    engine, db = make_session()
+    try:
+        company, students, posts, _ = seed_decisions(db)
+        expected = projections(db)
+        assert sorted(status for *_, status in expected["applications"]) == [
+            ApplicationStatus.ACCEPTED, ApplicationStatus.ACCEPTED, ApplicationStatus.PENDING,
+        ]
+        messages = db.query(Message).count()
+
+        # Projections drift (a bad write, old rules)...
+        db.query(StudentPostInteraction).update({"decision": Decision.PASS})
+        db.query(CompanyStudentPostInteraction).delete()
+        db.query(Application).update({
+            "student_decision": None, "company_decision": Decision.PASS, "status": ApplicationStatus.DECLINED,
+        })
+        db.commit()
+        # A decision the projector has not picked up yet is left to it.
+        student_decision_post(
+            StudentDecisionRequest(postId=posts[0].id, decision="LIKE"), BackgroundTasks(), db=db, current=students[2],
+        )
+
+        # ...and are re-derived from the log.
+        assert rebuild_decision_projections(db) == db.query(DecisionEvent).count() - 1
+        db.commit()
+        assert projections(db) == expected
+        assert db.query(Message).count() == messages
+        assert project_pending_decisions(db) == 1
+    finally:
+        db.close()
+
+
+def test_rebuild_keeps_statuses_set_by_the_company():
+    engine, db = make_session()
+    try:
+        company = make_user(db, "company", UserRole.COMPANY)
+        student = make_user(db, "student", UserRole.STUDENT)
+        post = InternshipPost(company_user_id=company.id, title="Post", description="desc")
+        db.add(post)
+        db.commit()
+
+        student_decision_post(StudentDecisionRequest(postId=post.id, decision="LIKE"), BackgroundTasks(), db=db, current=student)
+        project_pending_decisions(db)
+        app_id = db.query(Application.id).scalar()
+        set_application_status(
+            app_id, SetApplicationStatusRequest(status="ACCEPTED"), BackgroundTasks(), db=db, current=company,
+        )
+        project_pending_decisions(db)
+        expected = projections(db)
+        assert expected["applications"] == [(app_id, Decision.LIKE, None, ApplicationStatus.ACCEPTED)]
+
+        rebuild_decision_projections(db)
+        db.commit()
+        assert projections(db) == expected
+    finally:
+        db.close()
+
+
+def test_status_endpoint_sets_the_status_as_is():
+    engine, db = make_session()
+    try:
+        company = make_user(db, "company", UserRole.COMPANY)
+        student = make_user(db, "student", UserRole.STUDENT)
+        post = InternshipPost(company_user_id=company.id, title="Post", description="desc")
+        spost = StudentProfilePost(student_user_id=student.id, title="Student", description="desc")
+        db.add_all([post, spost])
+        db.commit()
+
+        # The company liked first: PENDING, waiting for the student.
+        company_decision_student_post(
+            CompanyDecisionStudentPostRequest(studentPostId=spost.id, decision="LIKE"), BackgroundTasks(),
+            db=db, current=company,
+        )
+        project_pending_decisions(db)
+        app = db.query(Application).one()
+        assert app.status == ApplicationStatus.PENDING
+
+        def set_status(status):
+            set_application_status(
+                app.id, SetApplicationStatusRequest(status=status), BackgroundTasks(), db=db, current=company,
+            )
+
+        # Repeating a request whose event is still pending logs it once.
+        events = db.query(DecisionEvent).count()
+        set_status("ACCEPTED")
+        set_status("ACCEPTED")
+        assert db.query(DecisionEvent).count() == events + 1
+        project_pending_decisions(db)
+        db.refresh(app)
+        assert (app.student_decision, app.company_decision, app.status) == (
+            None, Decision.LIKE, ApplicationStatus.ACCEPTED,
+        )
+        assert [m.text for m in db.query(Message)] == ["Ready to connect?"]
+
+        # Even against the student's PASS, and without touching either decision.
+        student_decision_post(StudentDecisionRequest(postId=post.id, decision="PASS"), BackgroundTasks(), db=db, current=student)
+        project_pending_decisions(db)
+        for status in ("ACCEPTED", "DECLINED", "ACCEPTED"):
+            set_status(status)
+            project_pending_decisions(db)
+            db.refresh(app)
+            assert (app.student_decision, app.company_decision, app.status) == (
+                Decision.PASS, Decision.LIKE, ApplicationStatus(status),
+            )
+    finally:
+        db.close()
+
+
+def test_rebuild_keeps_decisions_from_before_the_log():
+    engine, db = make_session()
+    try:
+        company = make_user(db, "company", UserRole.COMPANY)
+        student = make_user(db, "student", UserRole.STUDENT)
+        post = InternshipPost(company_user_id=company.id, title="Post", description="desc")
+        spost = StudentProfilePost(student_user_id=student.id, title="Student", description="desc")
+        db.add_all([post, spost])
+        db.flush()
+        # A student LIKE written before decision_events existed.
+        db.add(StudentPostInteraction(student_user_id=student.id, post_id=post.id, decision=Decision.LIKE))
+        db.add(Application(
+            post_id=post.id, student_user_id=student.id, company_user_id=company.id,
+            student_decision=Decision.LIKE, status=ApplicationStatus.PENDING,
+        ))
+        db.commit()
+
+        company_decision_student_post(
+            CompanyDecisionStudentPostRequest(studentPostId=spost.id, decision="LIKE"), BackgroundTasks(),
+            db=db, current=company,
+        )
+        project_pending_decisions(db)
+        expected = projections(db)
+        assert expected["applications"][0][1:] == (Decision.LIKE, Decision.LIKE, ApplicationStatus.ACCEPTED)
+
+        rebuild_decision_projections(db)
+        db.commit()
+        assert projections(db) == expected
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    test_every_decision_is_logged()
+    test_swipes_only_append_to_the_log()
+    test_rebuild_restores_the_projections()
+    test_rebuild_keeps_statuses_set_by_the_company()
+    test_status_endpoint_sets_the_status_as_is()
+    test_rebuild_keeps_decisions_from_before_the_log()
+    print("[OK] Decision events")
@@ -0,0 +1,181 @@
+"""
+Test script για το batch endpoint των αποφάσεων (POST /decisions/batch).
+
+Ελέγχει ότι ένα batch καταλήγει (μετά τον projector) στην ίδια κατάσταση με τα
+αντίστοιχα single-decision endpoints, ότι τα statements δεν αυξάνονται με το μέγεθος
+του batch και ότι ένα άγνωστο post αποτυγχάνει μόνο το δικό του item.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi import BackgroundTasks
+
+from app.models import (
+    UserRole, ApplicationStatus, Decision, DecisionEvent, CompanyProfile, InternshipPost, StudentProfilePost, Application,
+    Conversation, ConversationParticipant, Message, StudentPostInteraction, CompanyStudentPostInteraction,
+)
+from app.routers.interaction_routes import (
+    decisions_batch, student_decision_post, company_decision_student_post, project_pending_decisions,
+)
+from app.schemas import (
+    DecisionBatchItem, DecisionBatchRequest, StudentDecisionRequest, CompanyDecisionStudentPostRequest,
+)
+from testkit import make_session, count_queries, make_user
+
+
+def seed(db, companies: int, students: int):
+    """`companies` companies with one post each, `students` students with a profile post each."""
+    company_users, posts = [], []
+    for c in range(companies):
+        company = make_user(db, f"company{c}", UserRole.COMPANY)
+        db.add(CompanyProfile(user_id=company.id, company_name=f"Company {c}"))
+        post = InternshipPost(company_user_id=company.id, title=f"Post {c}", description="desc")
+        db.add(post)
+        company_users.append(company)
+        posts.append(post)
+
+    student_users, sposts = [], []
+    for s in range(students):
+        student = make_user(db, f"student{s}", UserRole.STUDENT)
+        spost = StudentProfilePost(student_user_id=student.id, title="Student", description="desc")
+        db.add(spost)
+        student_users.append(student)
+        sposts.append(spost)
+    db.commit()
+    return company_users, posts, student_users, sposts
+
+
+def snapshot(db):
+    """Everything the decisions touch, keyed by natural keys (ids may differ between runs)."""
+    return {
+        "student_interactions": sorted(
+            (r.student_user_id, r.post_id, r.decision) for r in db.query(StudentPostInteraction)
+        ),
+        "company_interactions": sorted(
+            (r.company_user_id, r.student_post_id, r.decision) for r in db.query(CompanyStudentPostInteraction)
+        ),
+        "applications": sorted(
+            (a.post_id, a.student_user_id, a.student_decision, a.company_decision, a.status)
+            for a in db.query(Application)
+        ),
+        "messages": sorted(
+            (a.post_id, a.student_user_id, m.text)
+            for m, a in db.query(Message, Application)
+            .join(Conversation, Message.conversation_id == Conversation.id)
+            .join(Application, Conversation.application_id == Application.id)
+        ),
+        "participants": db.query(ConversationParticipant).count(),
+    }
+
+
+def decide(db, current, items):
+    return decisions_batch(DecisionBatchRequest(decisions=items), BackgroundTasks(), db=db, current=current).results
+
+
+def test_batch_matches_single_decisions():
+    def run(batch: bool):
+        engine, db = make_session()
+        try:
+            company_users, posts, student_users, sposts = seed(db, companies=2, students=3)
+            student = student_users[0]
+            company = company_users[0]
+            student_items = [
+                DecisionBatchItem(postId=posts[0].id, decision="LIKE"),
+                DecisionBatchItem(postId=posts[1].id, decision="PASS"),
+            ]
+            company_items = [
+                DecisionBatchItem(studentPostId=sposts[0].id, decision="LIKE"),  # match
+                DecisionBatchItem(studentPostId=sposts[1].id, decision="LIKE"),  # company first
+                DecisionBatchItem(studentPostId=sposts[2].id, decision="PASS"),
+            ]
+            if batch:
+                decide(db, student, student_items)
+                decide(db, company, company_items)
+            else:
+                for item in student_items:
+                    student_decision_post(
+                        StudentDecisionRequest(postId=item.postId, decision=item.decision), BackgroundTasks(),
+                        db=db, current=student,
+                    )
+                for item in company_items:
+                    company_decision_student_post(
+                        CompanyDecisionStudentPostRequest(studentPostId=item.studentPostId, decision=item.decision),
+                        BackgroundTasks(), db=db, current=company,
+                    )
+            project_pending_decisions(db)
+            return snapshot(db)
+        finally:
+            db.close()
+
+    assert run(batch=True) == run(batch=False)
+
+
+def test_batch_results_and_lookups():
+    engine, db = make_session()
+    try:
+        company_users, posts, (student, *_), _ = seed(db, companies=6, students=1)
+        company = company_users[0]
+
+        # The first company already liked the student: that post is a match.
+        decide(db, company, [DecisionBatchItem(studentPostId=db.query(StudentProfilePost.id).scalar(), decision="LIKE")])
+        project_pending_decisions(db)
+
+        items = [DecisionBatchItem(postId=post.id, decision="LIKE") for post in posts]
+        items.append(DecisionBatchItem(postId=10_000, decision="LIKE"))
+        items.append(DecisionBatchItem(postId=posts[-1].id, decision="PASS"))  # changed their mind
+
+        db.refresh(student)  # as loaded by get_current_user
+        with count_queries(engine) as statements:
+            results = decide(db, student, items)
+        # One lookup of the posts and one multi-row insert into the log: not one per item.
+        # The interaction rows and applications are the projector's work.
+        assert len(statements) == 2, statements
+        assert statements[0].startswith("SELECT") and statements[1].startswith("INSERT INTO decision_events")
+
+        assert [(r.postId, r.ok, r.status, r.error) for r in results] == [
+            *[(post.id, True, "QUEUED", None) for post in posts],
+            (10_000, False, None, "Post not found"),
+            (posts[-1].id, True, "QUEUED", None),
+        ]
+        # Each logged item points at its own event.
+        events = {e.id: (e.post_id, e.decision) for e in db.query(DecisionEvent).filter(DecisionEvent.actor_role == UserRole.STUDENT)}
+        assert [events[r.eventId] for r in results if r.ok] == [
+            *[(post.id, Decision.LIKE) for post in posts],
+            (posts[-1].id, Decision.PASS),
+        ]
+        assert results[len(posts)].eventId is None
+
+        project_pending_decisions(db)
+        assert dict(db.query(Application.post_id, Application.status)) == {
+            posts[0].id: ApplicationStatus.ACCEPTED,
+            **{post.id: ApplicationStatus.PENDING for post in posts[1:-1]},
+            posts[-1].id: ApplicationStatus.DECLINED,
+        }
+    finally:
+        db.close()
+
+
+def test_batch_items_must_match_the_role():
+    engine, db = make_session()
+    try:
+        company_users, posts, (student,), (spost,) = seed(db, companies=1, students=1)
+        # A student item sent by a company fails that item only.
+        (result,) = decide(db, company_users[0], [DecisionBatchItem(postId=posts[0].id, decision="LIKE")])
+        assert not result.ok and result.error == "studentPostId is required"
+
+        (result,) = decide(db, student, [DecisionBatchItem(studentPostId=spost.id, decision="LIKE")])
+        assert not result.ok and result.error == "postId is required"
+        project_pending_decisions(db)
+        assert db.query(Application).count() == 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    test_batch_matches_single_decisions()
+    test_batch_results_and_lookups()
+    test_batch_items_must_match_the_role()
+    print("[OK] Decisions batch")
@@ -0,0 +1,319 @@
+"""
+Test script για το πλήθος των SQL queries των feeds.
+
+Ελέγχει ότι τα /feed/student και /feed/company τρέχουν σταθερό αριθμό queries,
+ανεξάρτητα από το πόσες κάρτες επιστρέφει (χωρίς N+1).
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi import BackgroundTasks, Response
+
+from app.departments import department_key
+from app.models import (
+    User, UserRole, CompanyProfile, InternshipPost, StudentPostInteraction,
+    StudentProfile, StudentProfilePost, CompanyStudentPostInteraction, Decision,
+)
+from app.feed_cache import invalidate_company_feeds
+from app.pagination import NEXT_CURSOR_HEADER
+from app.routers.feed_routes import student_feed, company_feed
+from app.routers.interaction_routes import project_pending_decisions, student_decision_post
+from app.routers.saves_routes import CompanySaveStudentRequest, set_saved_student_for_company
+from app.schemas import StudentDecisionRequest
+from testkit import make_session, count_queries, make_user
+
+
+def seed_student_feed(db, companies: int, posts_per_company: int) -> User:
+    student = User(username="student", email="student@example.com", password_hash="x", role=UserRole.STUDENT)
+    db.add(student)
+
+    for c in range(companies):
+        company = User(
+            username=f"company{c}",
+            email=f"company{c}@example.com",
+            password_hash="x",
+            role=UserRole.COMPANY,
+            profile_image_url=f"/uploads/profiles/company{c}.jpg",
+        )
+        db.add(company)
+        db.flush()
+        db.add(CompanyProfile(user_id=company.id, company_name=f"Company {c}", bio="bio", description="desc"))
+
+        for i in range(posts_per_company):
+            post = InternshipPost(
+                company_user_id=company.id,
+                title=f"Post {c}-{i}",
+                description="desc",
+                department="Software Development",
+                department_key="software development",
+            )
+            db.add(post)
+            db.flush()
+            if i == 0:
+                db.add(StudentPostInteraction(student_user_id=student.id, post_id=post.id, saved=True))
+
+    db.commit()
+    return student
+
+
+def student_feed_query_count(companies: int, posts_per_company: int) -> tuple[int, list]:
+    engine, db = make_session()
+    try:
+        student = seed_student_feed(db, companies, posts_per_company)
+        db.expire_all()
+        student = db.get(User, student.id)
+
+        with count_queries(engine) as statements:
+            feed = student_feed(
+                request=None, response=Response(), department=None, cursor=None, limit=50,
+                db=db, current=student,
+            )
+        return len(statements), feed
+    finally:
+        db.close()
+
+
+def test_student_feed_query_count_is_constant():
+    small_count, small_feed = student_feed_query_count(companies=1, posts_per_company=3)
+    large_count, large_feed = student_feed_query_count(companies=10, posts_per_company=4)
+
+    assert len(small_feed) == 3
+    assert len(large_feed) == 40
+    assert small_count == large_count, (small_count, large_count)
+    assert large_count <= 2, large_count
+
+
+def test_student_feed_hydrates_company_and_saved_state():
+    _, feed = student_feed_query_count(companies=2, posts_per_company=2)
+
+    for card in feed:
+        assert card.companyName and card.companyName.startswith("Company ")
+        assert card.username and card.username.startswith("company")
+        assert card.companyProfileImageUrl and card.companyProfileImageUrl.startswith("/uploads/profiles/")
+        assert card.bio == "bio"
+        assert card.companyBio == "desc"
+
+    assert sorted(card.saved for card in feed) == [False, False, True, True]
+
+
+def seed_company_feed(db, students: int) -> User:
+    company = User(username="company", email="company@example.com", password_hash="x", role=UserRole.COMPANY)
+    db.add(company)
+
+    for s in range(students):
+        student = User(
+            username=f"student{s}",
+            email=f"student{s}@example.com",
+            password_hash="x",
+            role=UserRole.STUDENT,
+            name=f"Name{s}",
+            surname=f"Surname{s}",
+        )
+        db.add(student)
+        db.flush()
+        db.add(StudentProfile(user_id=student.id, university="UoA", department="Informatics"))
+        db.add(StudentProfilePost(
+            student_user_id=student.id,
+            title=f"Student {s}",
+            description="desc",
+            department_key=department_key("Informatics"),
+        ))
+
+    db.commit()
+    return company
+
+
+def company_feed_query_count(students: int, department: str | None = None) -> tuple[int, list]:
+    engine, db = make_session()
+    try:
+        company = seed_company_feed(db, students)
+        db.expire_all()
+        company = db.get(User, company.id)
+
+        with count_queries(engine) as statements:
+            feed = company_feed(
+                request=None, response=Response(), department=department, cursor=None, limit=50,
+                db=db, current=company,
+            )
+        return len(statements), feed
+    finally:
+        db.close()
+
+
+def test_company_feed_query_count_is_constant():
+    small_count, small_feed = company_feed_query_count(students=2)
+    large_count, large_feed = company_feed_query_count(students=30)
+
+    assert len(small_feed) == 2
+    assert len(large_feed) == 30
+    assert small_count == large_count, (small_count, large_count)
+    assert large_count <= 2, large_count
+
+    for card in large_feed:
+        assert card.studentUsername and card.studentUsername.startswith("student")
+        assert card.studentName and card.studentSurname
+        assert card.university == "UoA"
+        assert card.department == "Informatics"
+
+
+def test_company_feed_department_filter():
+    _, feed = company_feed_query_count(students=3, department="informatics")
+    assert len(feed) == 3
+
+    _, feed = company_feed_query_count(students=3, department="Marketing")
+    assert feed == []
+
+
+def test_company_feed_exclusions():
+    _, db = make_session()
+    try:
+        company = seed_company_feed(db, students=3)
+        other_company = User(username="other", email="other@example.com", password_hash="x", role=UserRole.COMPANY)
+        db.add(other_company)
+        db.flush()
+        own_post = InternshipPost(company_user_id=company.id, title="Own", description="desc")
+        other_post = InternshipPost(company_user_id=other_company.id, title="Other", description="desc")
+        db.add_all([own_post, other_post])
+        db.flush()
+
+        passed, liked_decided, liked_undecided = (
+            db.query(StudentProfilePost).order_by(StudentProfilePost.id).all()
+        )
+        decided_at = datetime.utcnow() + timedelta(seconds=1)
+        for spost, decision in ((passed, Decision.PASS), (liked_decided, Decision.LIKE), (liked_undecided, Decision.LIKE)):
+            db.add(CompanyStudentPostInteraction(
+                company_user_id=company.id,
+                student_post_id=spost.id,
+                decision=decision,
+                decided_at=decided_at,
+            ))
+
+        # A LIKEd card is hidden once the student has decided on any post (here another company's).
+        db.add(StudentPostInteraction(student_user_id=liked_decided.student_user_id, post_id=other_post.id, decision=Decision.LIKE))
+        db.add(StudentPostInteraction(student_user_id=liked_undecided.student_user_id, post_id=own_post.id, decision=Decision.NONE))
+        db.commit()
+
+        def feed_ids():
+            return {
+                card.id for card in company_feed(
+                    request=None, response=Response(), department=None, cursor=None, limit=50,
+                    db=db, current=company,
+                )
+            }
+
+        assert feed_ids() == {liked_undecided.id}
+
+        # A profile update after the PASS brings the card back.
+        passed.updated_at = decided_at + timedelta(seconds=1)
+        db.commit()
+        invalidate_company_feeds()
+        assert feed_ids() == {passed.id, liked_undecided.id}
+
+        # A student's first decision, on another company's post, reaches the cached page too.
+        student = db.get(User, liked_undecided.student_user_id)
+        student_decision_post(
+            StudentDecisionRequest(postId=other_post.id, decision="PASS"), BackgroundTasks(), db=db, current=student,
+        )
+        project_pending_decisions(db)
+        assert feed_ids() == {passed.id}
+    finally:
+        db.close()
+
+
+def test_student_feed_cache_and_invalidation():
+    engine, db = make_session()
+    try:
+        student = seed_student_feed(db, companies=1, posts_per_company=3)
+
+        def feed():
+            return student_feed(
+                request=None, response=Response(), department=None, cursor=None, limit=50,
+                db=db, current=student,
+            )
+
+        with count_queries(engine) as cold:
+            first = feed()
+        with count_queries(engine) as warm:
+            second = feed()
+
+        # A warm request only hydrates the cached card IDs.
+        assert [card.id for card in first] == [card.id for card in second]
+        assert len(warm) == 1, warm
+        assert len(cold) > len(warm)
+
+        # Deciding on a card invalidates the student's cached deck.
+        passed_id = first[0].id
+        student_decision_post(
+            StudentDecisionRequest(postId=passed_id, decision="PASS"), BackgroundTasks(), db=db, current=student,
+        )
+        project_pending_decisions(db)
+        assert passed_id not in {card.id for card in feed()}
+    finally:
+        db.close()
+
+
+def test_company_feed_sees_profile_posts_created_by_a_save():
+    _, db = make_session()
+    try:
+        company = seed_company_feed(db, students=1)
+        student = make_user(db, "newcomer", UserRole.STUDENT)
+        db.commit()
+
+        def feed_ids():
+            return {
+                card.id for card in company_feed(
+                    request=None, response=Response(), department=None, cursor=None, limit=50,
+                    db=db, current=company,
+                )
+            }
+
+        before = feed_ids()
+        # Saving a student who has no profile card yet creates it.
+        set_saved_student_for_company(CompanySaveStudentRequest(studentUserId=student.id, saved=True), db=db, current=company)
+        created = db.query(StudentProfilePost.id).filter(StudentProfilePost.student_user_id == student.id).scalar()
+        assert feed_ids() == before | {created}
+    finally:
+        db.close()
+
+
+def test_feed_cursor_pagination():
+    _, db = make_session()
+    try:
+        student = seed_student_feed(db, companies=1, posts_per_company=7)
+        company = seed_company_feed(db, students=5)
+
+        for feed, current, total in ((student_feed, student, 7), (company_feed, company, 5)):
+            seen = []
+            cursor = None
+            while True:
+                response = Response()
+                page = feed(
+                    request=None, response=response, department=None, cursor=cursor, limit=3,
+                    db=db, current=current,
+                )
+                assert len(page) <= 3
+                seen.extend(card.id for card in page)
+                cursor = response.headers.get(NEXT_CURSOR_HEADER)
+                if cursor is None:
+                    break
+
+            assert len(seen) == total
+            assert len(set(seen)) == total
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    test_student_feed_query_count_is_constant()
+    test_student_feed_hydrates_company_and_saved_state()
+    test_company_feed_query_count_is_constant()
+    test_company_feed_department_filter()
+    test_company_feed_exclusions()
+    test_student_feed_cache_and_invalidation()
+    test_company_feed_sees_profile_posts_created_by_a_save()
+    test_feed_cursor_pagination()
+    print("[OK] Feed query counts are constant")
@@ -6,9 +6,14 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from app.db import SessionLocal
-from app.models import User, UserRole, Application, Conversation, Message, MessageType
-from datetime import datetime
+from sqlalchemy import text
+
+from app.db import SessionLocal, engine
+from app.messaging import RECONCILE_UNREAD_COUNTS_SQL
+from app.migrations import ensure_conversation_participants
+from app.models import User, Application, Conversation, ConversationParticipant, Message, MessageType
+from app.routers.chat_routes import mark_conversation_read
+from app.schemas import MarkConversationReadRequest
 
 
 def test_mark_as_read():
@@ -45,50 +50,29 @@ def test_mark_as_read():
             print(f"  {i+1}. [{sender}] {msg.text[:50]}...")
         print()
         
-        # Simulate: Check unread count for student BEFORE mark as read
-        from app.routers.chat_routes import _unread_count, _ensure_participant
-        
-        # Ensure participant exists
-        part = _ensure_participant(
-            db,
-            conversation_id=conv.id,
-            user_id=app.student_user_id,
-            seed_last_read_to_last_message=False  # Don't auto-mark
+        # Participant rows come from the startup backfill (migrations.py)
+        ensure_conversation_participants(engine)
+        part = (
+            db.query(ConversationParticipant)
+            .filter_by(conversation_id=conv.id, user_id=app.student_user_id)
+            .one()
         )
         
-        # Count unread (assuming student hasn't read any)
+        # Unread count BEFORE mark as read (assuming student hasn't read any)
         part.last_read_message_id = None  # Reset to simulate fresh user
         db.flush()
-        
-        unread_before = _unread_count(
-            db,
-            conversation_id=conv.id,
-            user_id=app.student_user_id,
-            last_read_message_id=part.last_read_message_id
-        )
+        db.execute(text(RECONCILE_UNREAD_COUNTS_SQL))
+        db.refresh(part)
+        unread_before = part.unread_count
         
         print(f"[BEFORE] Student unread count: {unread_before}")
         print()
         
-        # Simulate: Mark as read
-        from sqlalchemy import func
-        last_msg_id = (
-            db.query(func.max(Message.id))
-            .filter(Message.conversation_id == conv.id)
-            .scalar()
-        )
-        
-        part.last_read_message_id = last_msg_id
-        part.updated_at = datetime.utcnow()
-        db.commit()
-        
-        # Check unread count AFTER
-        unread_after = _unread_count(
-            db,
-            conversation_id=conv.id,
-            user_id=app.student_user_id,
-            last_read_message_id=part.last_read_message_id
-        )
+        # Mark as read (up to the latest message)
+        student = db.get(User, app.student_user_id)
+        unread_after = mark_conversation_read(
+            conv.id, MarkConversationReadRequest(), db=db, current=student,
+        ).unreadCount
         
         print(f"[AFTER] Student unread count: {unread_after}")
         print()
@@ -0,0 +1,183 @@
+"""
+Test script για τα query plans (EXPLAIN QUERY PLAN) των hot paths.
+
+Ελέγχει ότι τα feeds χρησιμοποιούν τα σωστά indexes και
+δεν κάνουν full scan σε πίνακες που μεγαλώνουν με τη δραστηριότητα της πλατφόρμας.
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi import Response
+from sqlalchemy import event
+
+from app.feed_cache import feed_cache
+from app.models import UserRole
+from app.pagination import encode_cursor
+from app.routers.application_routes import list_applications
+from app.routers.chat_routes import unread_summary
+from app.routers.interaction_routes import latest_active_company_post, latest_company_student_application
+from app.routers.feed_routes import company_feed, student_feed
+from testkit import make_session, make_user
+
+
+def query_plans(engine, fn) -> list[str]:
+    """Run `fn` and return the EXPLAIN QUERY PLAN lines of every SELECT it issued."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    lines = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters):
+                lines.append(row[3])
+    return lines
+
+
+def test_company_feed_exclusion_probes():
+    engine, db = make_session()
+    try:
+        company = make_user(db, "company", UserRole.COMPANY)
+
+        plan = query_plans(engine, lambda: company_feed(
+            request=None, response=Response(), department=None, cursor=None, limit=50,
+            db=db, current=company,
+        ))
+
+        # No pass over every interaction on the platform.
+        assert not any(line.startswith("SCAN student_post_interactions") for line in plan), plan
+        assert not any(line.startswith("SCAN company_student_post_interactions") for line in plan), plan
+
+        # Each candidate card costs one seek on the company's own decision row...
+        assert any(
+            line.startswith("SEARCH company_student_post_interactions")
+            and "company_user_id=? AND student_post_id=?" in line
+            for line in plan
+        ), plan
+        # ...and, for LIKEs, one correlated probe on that student's own interactions.
+        assert any(
+            line.startswith("SEARCH student_post_interactions") and "student_user_id=?" in line
+            for line in plan
+        ), plan
+        assert any(line.startswith("CORRELATED SCALAR SUBQUERY") for line in plan), plan
+    finally:
+        db.close()
+
+
+def test_feed_pages_are_index_range_scans():
+    engine, db = make_session()
+    try:
+        student = make_user(db, "student", UserRole.STUDENT)
+        company = make_user(db, "company", UserRole.COMPANY)
+        deep_cursor = encode_cursor(datetime(2026, 1, 1), 1000)
+
+        for feed, current, table in (
+            (student_feed, student, "internship_posts"),
+            (company_feed, company, "student_profile_posts"),
+        ):
+            for department in (None, "IT"):
+                for cursor in (None, deep_cursor):
+                    feed_cache.clear()
+                    plan = query_plans(engine, lambda: feed(
+                        request=None, response=Response(), department=department, cursor=cursor, limit=20,
+                        db=db, current=current,
+                    ))
+
+                    # The page walks an (..., is_active, created_at) index in order and stops
+                    # after `limit` rows: no catalog scan, no sort.
+                    assert not any(line.startswith(f"SCAN {table}") for line in plan), plan
+                    assert not any("TEMP B-TREE FOR ORDER BY" in line for line in plan), plan
+                    assert any(
+                        line.startswith(f"SEARCH {table}") and "active_created" in line
+                        for line in plan
+                    ), plan
+                    if cursor:
+                        assert any(
+                            line.startswith(f"SEARCH {table}") and "created_at<?" in line
+                            for line in plan
+                        ), plan
+    finally:
+        db.close()
+
+
+def test_applications_page_is_index_range_scan():
+    engine, db = make_session()
+    try:
+        student = make_user(db, "student", UserRole.STUDENT)
+        company = make_user(db, "company", UserRole.COMPANY)
+        deep_cursor = encode_cursor(datetime(2026, 1, 1), 1000)
+
+        for current, index in (
+            (student, "ix_applications_student_updated"),
+            (company, "ix_applications_company_updated"),
+        ):
+            for cursor in (None, deep_cursor):
+                plan = query_plans(engine, lambda: list_applications(
+                    request=None, response=Response(), status=None, post_id=None, unread_only=False,
+                    cursor=cursor, limit=20, db=db, current=current,
+                ))
+
+                # The page walks the user's (user_id, updated_at) index; no pass over all applications.
+                assert not any(line.startswith("SCAN applications") for line in plan), plan
+                assert any(
+                    line.startswith("SEARCH applications USING INDEX " + index)
+                    and ("updated_at<?" in line) == bool(cursor)
+                    for line in plan
+                ), plan
+    finally:
+        db.close()
+
+
+def test_unread_summary_is_an_index_only_read():
+    engine, db = make_session()
+    try:
+        student = make_user(db, "student", UserRole.STUDENT)
+        plan = query_plans(engine, lambda: unread_summary(db=db, current=student))
+
+        assert any(
+            line.startswith("SEARCH conversation_participants USING COVERING INDEX ix_conversation_participants_user_unread")
+            for line in plan
+        ), plan
+    finally:
+        db.close()
+
+
+def test_company_decision_lookups_are_single_seeks():
+    engine, db = make_session()
+    try:
+        company_id = make_user(db, "company", UserRole.COMPANY).id
+        student_id = make_user(db, "student", UserRole.STUDENT).id
+
+        for fn, expected in (
+            (lambda: latest_company_student_application(db, company_id, student_id),
+             "SEARCH applications USING INDEX ix_applications_company_student_updated "
+             "(company_user_id=? AND student_user_id=?)"),
+            (lambda: latest_active_company_post(db, company_id),
+             "SEARCH internship_posts USING INDEX ix_internship_posts_company_active_created "
+             "(company_user_id=? AND is_active=?)"),
+        ):
+            # Seek to the pair and read the newest entry off the index: no scan, no sort.
+            assert query_plans(engine, fn) == [expected]
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    test_company_feed_exclusion_probes()
+    test_feed_pages_are_index_range_scans()
+    test_applications_page_is_index_range_scan()
+    test_unread_summary_is_an_index_only_read()
+    test_company_decision_lookups_are_single_seeks()
+    print("[OK] Query plans use the expected indexes")
@@ -0,0 +1,106 @@
+"""
+Test script για τα upserts (app/upserts.py) των interaction / application rows.
+
+Ελέγχει ότι κάθε helper είναι ένα μόνο statement, ότι βρίσκει τη γραμμή που
+υπάρχει ήδη (αντί για IntegrityError στο unique constraint) και ότι το ίδιο
+statement βγαίνει και για PostgreSQL.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy.dialects import postgresql
+
+from app.models import (
+    User, UserRole, InternshipPost, StudentProfilePost, Application, ApplicationStatus, Decision,
+    StudentPostInteraction,
+)
+from app.routers.interaction_routes import (
+    ensure_student_interaction_row, ensure_company_studentpost_interaction, get_or_create_application,
+)
+from app.routers.saves_routes import ensure_student_post_interaction_row
+from app.upserts import upsert_statement
+from testkit import make_sessionmaker, count_queries
+
+
+def seed(db):
+    company = User(username="company", email="company@example.com", password_hash="x", role=UserRole.COMPANY)
+    student = User(username="student", email="student@example.com", password_hash="x", role=UserRole.STUDENT)
+    db.add_all([company, student])
+    db.flush()
+    post = InternshipPost(company_user_id=company.id, title="Backend Intern", description="desc")
+    spost = StudentProfilePost(student_user_id=student.id, title="Student", description="desc")
+    db.add_all([post, spost])
+    db.commit()
+    return company.id, student.id, post.id, spost.id
+
+
+def test_interaction_upserts_are_one_statement():
+    engine, Session = make_sessionmaker()
+    with Session() as db:
+        company_id, student_id, post_id, spost_id = seed(db)
+
+    with Session() as db:
+        with count_queries(engine) as statements:
+            row = ensure_student_interaction_row(db, student_id, post_id, decision=Decision.LIKE)
+        assert len(statements) == 1 and statements[0].startswith("INSERT")
+        assert row.decision == Decision.LIKE and row.saved is False
+        row_id = row.id
+        db.commit()
+
+    # A second request (another session, the row is not loaded there) finds the same row.
+    with Session() as db:
+        with count_queries(engine) as statements:
+            saved = ensure_student_post_interaction_row(db, student_id, post_id, saved=True)
+        assert len(statements) == 1
+        assert saved.id == row_id
+        # Only the given columns change.
+        assert saved.saved is True and saved.decision == Decision.LIKE
+        db.commit()
+
+        # No changes: the row comes back as it is.
+        assert ensure_student_interaction_row(db, student_id, post_id).decision == Decision.LIKE
+        assert db.query(StudentPostInteraction).count() == 1
+
+        first = ensure_company_studentpost_interaction(db, company_id, spost_id, decision=Decision.PASS)
+        again = ensure_company_studentpost_interaction(db, company_id, spost_id)
+        assert first is again and again.decision == Decision.PASS
+
+
+def test_get_or_create_application_keeps_the_existing_row():
+    engine, Session = make_sessionmaker()
+    with Session() as db:
+        company_id, student_id, post_id, _ = seed(db)
+        app = get_or_create_application(db, student_id, company_id, post_id)
+        app.status = ApplicationStatus.ACCEPTED
+        db.commit()
+        app_id = app.id
+
+    with Session() as db:
+        with count_queries(engine) as statements:
+            app = get_or_create_application(db, student_id, company_id, post_id)
+        assert len(statements) == 1
+        assert app.id == app_id and app.status == ApplicationStatus.ACCEPTED
+        assert db.query(Application).count() == 1
+
+
+def test_postgresql_statement():
+    stmt = upsert_statement(
+        "postgresql",
+        StudentPostInteraction,
+        conflict=("student_user_id", "post_id"),
+        values={"student_user_id": 1, "post_id": 2, "saved": True},
+        update={"saved": True},
+    )
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (student_user_id, post_id) DO UPDATE SET saved" in sql
+    assert "RETURNING" in sql
+
+
+if __name__ == "__main__":
+    test_interaction_upserts_are_one_statement()
+    test_get_or_create_application_keeps_the_existing_row()
+    test_postgresql_statement()
+    print("[OK] Upserts")
@@ -0,0 +1,56 @@
+"""
+Κοινά helpers για τα test scripts: in-memory βάση, μέτρημα queries, χρήστες.
+
+Τα test scripts τρέχουν και με pytest και σαν `python test_x.py`, γι' αυτό
+είναι απλό module (κάνουν import από το root του repo).
+"""
+
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import Base
+from app.feed_cache import feed_cache
+from app.membership_cache import membership_cache
+from app.models import User, UserRole
+
+
+def make_sessionmaker():
+    """A fresh in-memory DB with every table, and empty in-process caches."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    feed_cache.clear()
+    membership_cache.clear()
+    return engine, sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+
+def make_session():
+    engine, Session = make_sessionmaker()
+    return engine, Session()
+
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def make_user(db, username: str, role: UserRole, **fields) -> User:
+    user = User(username=username, email=f"{username}@example.com", password_hash="x", role=role, **fields)
+    db.add(user)
+    db.flush()
+    return user